@@ -8,11 +8,30 @@ This module demonstrates the key changes for extended skin tone classification:
 - Backward compatibility
 """
 
+import cv2
 import numpy as np
 from typing import Dict, Tuple, Any
 from app.config.skin_tone_enums import SkinDepth, Undertone, DEPTH_THRESHOLDS, UNDERTONE_HUE_RANGES
 
 
+# Legacy 3x3 names, indexed by SkinDepth.level - 1 and Undertone.code
+_LEGACY_DEPTH_BY_LEVEL: Tuple[str, ...] = (
+    'Fair',     # VERY_FAIR
+    'Fair',     # FAIR
+    'Medium',   # MEDIUM
+    'Medium',   # TAN
+    'Dark',     # DARK
+    'Dark'      # DEEP
+)
+_LEGACY_UNDERTONE_BY_CODE: Tuple[str, ...] = (
+    'Warm',     # WARM
+    'Cool',     # COOL
+    'Neutral',  # NEUTRAL
+    'Neutral',  # OLIVE - closest match
+    'Warm'      # GOLDEN - closest match
+)
+
+
 class ExtendedSkinToneAnalyzer:
     """
     Extended version of SkinToneAnalyzer supporting 6 depths × 5 undertones = 30 combinations.
@@ -45,7 +64,18 @@ class ExtendedSkinToneAnalyzer:
         Returns:
             Tuple of (depth_enum, depth_level, percentile_range)
         """
-        mean_value = np.mean(value_values)
+        return self._classify_depth_from_mean(np.mean(value_values))
+    
+    def _classify_depth_from_mean(self, mean_value: float) -> Tuple[SkinDepth, int, Tuple[int, int]]:
+        """
+        Classify skin depth from the mean V channel value (0-255).
+        
+        Args:
+            mean_value: Mean V channel value of skin pixels
+            
+        Returns:
+            Tuple of (depth_enum, depth_level, percentile_range)
+        """
         depth_enum = SkinDepth.from_value(int(mean_value))
         level = depth_enum.get_level()
         percentile = depth_enum.get_percentile()
@@ -59,12 +89,23 @@ class ExtendedSkinToneAnalyzer:
         Args:
             hue_values: H channel values (0-180 OpenCV scale)
             
+        Returns:
+            Tuple of (undertone_enum, mean_hue_degrees, is_cool_spectrum)
+        """
+        return self._classify_undertone_from_mean(np.mean(hue_values.astype(float)))
+    
+    def _classify_undertone_from_mean(self, mean_hue: float) -> Tuple[Undertone, float, bool]:
+        """
+        Classify undertone from the mean H channel value.
+        
+        Args:
+            mean_hue: Mean hue of skin pixels (0-180 OpenCV scale)
+            
         Returns:
             Tuple of (undertone_enum, mean_hue_degrees, is_cool_spectrum)
         """
         # Convert OpenCV hue (0-180) to degrees (0-360)
-        hue_degrees = (hue_values.astype(float) / 180) * 360
-        mean_hue = np.mean(hue_degrees)
+        mean_hue = (float(mean_hue) / 180) * 360
         mean_hue = mean_hue % 360
         
         undertone_enum = Undertone.from_hue(mean_hue)
@@ -72,6 +113,34 @@ class ExtendedSkinToneAnalyzer:
         
         return undertone_enum, mean_hue, is_cool
     
+    def classify_skin_region(
+        self,
+        image_hsv: np.ndarray,
+        skin_mask: np.ndarray
+    ) -> Tuple[SkinDepth, Undertone, float, float, float]:
+        """
+        Classify depth and undertone straight from an HSV image and skin mask.
+        
+        A single cv2.meanStdDev call reduces all three channels over the
+        masked pixels, so no per-channel arrays or float copies of the hue
+        channel are created.
+        
+        Args:
+            image_hsv: HSV image (OpenCV scale, uint8)
+            skin_mask: Binary mask (0 or 255) of skin pixels
+            
+        Returns:
+            Tuple of (depth_enum, undertone_enum, mean_hue_degrees,
+                      saturation 0-1, brightness 0-1)
+        """
+        means, _ = cv2.meanStdDev(image_hsv, mask=skin_mask)
+        mean_h, mean_s, mean_v = means.ravel()
+        
+        depth_enum, _, _ = self._classify_depth_from_mean(mean_v)
+        undertone_enum, mean_hue, _ = self._classify_undertone_from_mean(mean_h)
+        
+        return depth_enum, undertone_enum, mean_hue, float(mean_s) / 255, float(mean_v) / 255
+    
     def _get_palette(self, depth: SkinDepth, undertone: Undertone) -> Dict[str, Any]:
         """
         Dynamically resolve palette for depth + undertone combination.
@@ -87,9 +156,10 @@ class ExtendedSkinToneAnalyzer:
         """
         key = f"{depth.value}-{undertone.value}"
         
-        # Try exact match
-        if key in self.palettes:
-            return self.palettes[key]
+        # Try exact match (one lookup, not an `in` check plus indexing)
+        palette = self.palettes.get(key)
+        if palette is not None:
+            return palette
         
         # Fallback to Medium-Neutral
         default_key = "Medium-Neutral"
@@ -120,8 +190,8 @@ class ExtendedSkinToneAnalyzer:
         Returns:
             Complete extended response dictionary
         """
-        depth_level, level_num, percentile = self._classify_depth_extended(
-            np.array([brightness * 255])
+        depth_level, level_num, percentile = self._classify_depth_from_mean(
+            brightness * 255
         )
         
         palette = self._get_palette(depth, undertone)
@@ -189,26 +259,9 @@ class ExtendedSkinToneAnalyzer:
         Returns:
             Tuple of (legacy_depth, legacy_undertone)
         """
-        legacy_depth_map = {
-            SkinDepth.VERY_FAIR: 'Fair',
-            SkinDepth.FAIR: 'Fair',
-            SkinDepth.MEDIUM: 'Medium',
-            SkinDepth.TAN: 'Medium',
-            SkinDepth.DARK: 'Dark',
-            SkinDepth.DEEP: 'Dark'
-        }
-        
-        legacy_undertone_map = {
-            Undertone.WARM: 'Warm',
-            Undertone.COOL: 'Cool',
-            Undertone.NEUTRAL: 'Neutral',
-            Undertone.OLIVE: 'Neutral',  # Closest match
-            Undertone.GOLDEN: 'Warm'     # Closest match
-        }
-        
         return (
-            legacy_depth_map.get(depth, 'Medium'),
-            legacy_undertone_map.get(undertone, 'Neutral')
+            _LEGACY_DEPTH_BY_LEVEL[depth.level - 1],
+            _LEGACY_UNDERTONE_BY_CODE[undertone.code]
         )
 
 
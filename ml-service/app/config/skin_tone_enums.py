@@ -4,19 +4,33 @@ Skin Tone Enums and Configuration
 Defines the extended skin tone classification system with 6 depths and 5 undertones.
 """
 
+import math
+from bisect import bisect_left
 from enum import Enum
 from typing import Dict, Tuple
 
 
 class SkinDepth(Enum):
-    """Extended skin depth classification (6 levels)."""
+    """
+    Extended skin depth classification (6 levels).
     
-    VERY_FAIR = "Very Fair"
-    FAIR = "Fair"
-    MEDIUM = "Medium"
-    TAN = "Tan"
-    DARK = "Dark"
-    DEEP = "Deep"
+    Each member carries its numeric level (1-6) and brightness percentile
+    range as plain attributes; the enum value stays the display string.
+    """
+    
+    VERY_FAIR = ("Very Fair", 1, (82, 100))
+    FAIR = ("Fair", 2, (71, 82))
+    MEDIUM = ("Medium", 3, (55, 71))
+    TAN = ("Tan", 4, (39, 55))
+    DARK = ("Dark", 5, (24, 39))
+    DEEP = ("Deep", 6, (0, 24))
+    
+    def __new__(cls, value: str, level: int, percentile: Tuple[int, int]):
+        member = object.__new__(cls)
+        member._value_ = value
+        member.level = level
+        member.percentile = percentile
+        return member
     
     @classmethod
     def from_value(cls, value: int) -> 'SkinDepth':
@@ -29,52 +43,51 @@ class SkinDepth(Enum):
         Returns:
             SkinDepth enum value
         """
-        if value > 210:
-            return cls.VERY_FAIR
-        elif value > 180:
-            return cls.FAIR
-        elif value > 140:
-            return cls.MEDIUM
-        elif value > 100:
-            return cls.TAN
-        elif value > 60:
-            return cls.DARK
-        else:
-            return cls.DEEP
+        # Number of thresholds strictly below value picks the bucket
+        return _DEPTHS_BY_BRIGHTNESS[bisect_left(_DEPTH_BOUNDARIES, value)]
     
     def get_level(self) -> int:
         """Get numeric level (1-6)."""
-        levels = {
-            'Very Fair': 1,
-            'Fair': 2,
-            'Medium': 3,
-            'Tan': 4,
-            'Dark': 5,
-            'Deep': 6
-        }
-        return levels.get(self.value, 3)
+        return self.level
     
     def get_percentile(self) -> Tuple[int, int]:
         """Get brightness percentile range."""
-        percentiles = {
-            'Very Fair': (82, 100),
-            'Fair': (71, 82),
-            'Medium': (55, 71),
-            'Tan': (39, 55),
-            'Dark': (24, 39),
-            'Deep': (0, 24)
-        }
-        return percentiles.get(self.value, (39, 55))
+        return self.percentile
+
+
+# Lookup tables for SkinDepth, built once at import
+# A value strictly greater than a boundary moves up one bucket
+_DEPTH_BOUNDARIES: Tuple[int, ...] = (60, 100, 140, 180, 210)
+_DEPTHS_BY_BRIGHTNESS: Tuple[SkinDepth, ...] = (
+    SkinDepth.DEEP,
+    SkinDepth.DARK,
+    SkinDepth.TAN,
+    SkinDepth.MEDIUM,
+    SkinDepth.FAIR,
+    SkinDepth.VERY_FAIR
+)
 
 
 class Undertone(Enum):
-    """Extended undertone classification (5 types)."""
+    """
+    Extended undertone classification (5 types).
     
-    WARM = "Warm"
-    COOL = "Cool"
-    NEUTRAL = "Neutral"
-    OLIVE = "Olive"
-    GOLDEN = "Golden"
+    Each member carries a small integer code (0-4), usable as a table
+    index, and its hue range in degrees as plain attributes.
+    """
+    
+    WARM = ("Warm", 0, (0, 30))
+    COOL = ("Cool", 1, (330, 360))
+    NEUTRAL = ("Neutral", 2, (30, 60))
+    OLIVE = ("Olive", 3, (60, 90))
+    GOLDEN = ("Golden", 4, (90, 120))
+    
+    def __new__(cls, value: str, code: int, hue_range: Tuple[int, int]):
+        member = object.__new__(cls)
+        member._value_ = value
+        member.code = code
+        member.hue_range = hue_range
+        return member
     
     @classmethod
     def from_hue(cls, hue_degrees: float) -> 'Undertone':
@@ -90,30 +103,11 @@ class Undertone(Enum):
         # Normalize to 0-360
         hue = hue_degrees % 360
         
-        # Check ranges (in order of check)
-        if 0 <= hue <= 30 or hue == 360:  # Wrap-around for cool
-            return cls.WARM
-        elif 30 < hue <= 60:
-            return cls.NEUTRAL
-        elif 60 < hue <= 90:
-            return cls.OLIVE
-        elif 90 < hue <= 120:
-            return cls.GOLDEN
-        elif 330 <= hue < 360:  # Cool wrap-around
-            return cls.COOL
-        else:
-            return cls.NEUTRAL
+        return _UNDERTONES_BY_HUE[bisect_left(_HUE_BOUNDARIES, hue)]
     
     def get_hue_range(self) -> Tuple[int, int]:
         """Get hue range in degrees for this undertone."""
-        ranges = {
-            'Warm': (0, 30),
-            'Cool': (330, 360),
-            'Neutral': (30, 60),
-            'Olive': (60, 90),
-            'Golden': (90, 120)
-        }
-        return ranges.get(self.value, (30, 60))
+        return self.hue_range
     
     def is_cool_spectrum(self) -> bool:
         """Check if undertone is in cool spectrum."""
@@ -124,6 +118,25 @@ class Undertone(Enum):
         return self in [Undertone.WARM, Undertone.GOLDEN]
 
 
+# Lookup tables for Undertone.from_hue, built once at import
+# Buckets are [0, 30], (30, 60], (60, 90], (90, 120], (120, 330), [330, 360)
+# plus 360 itself (float wrap-around of tiny negative hues), which counts
+# as Warm. The last two bucket starts are closed on the left, so they are
+# stored as the largest float just below the boundary.
+_HUE_BOUNDARIES: Tuple[float, ...] = (
+    30, 60, 90, 120, math.nextafter(330, 0), math.nextafter(360, 0)
+)
+_UNDERTONES_BY_HUE: Tuple[Undertone, ...] = (
+    Undertone.WARM,
+    Undertone.NEUTRAL,
+    Undertone.OLIVE,
+    Undertone.GOLDEN,
+    Undertone.NEUTRAL,   # 120-330 is outside every named range
+    Undertone.COOL,
+    Undertone.WARM
+)
+
+
 # Configuration constants
 
 DEPTH_THRESHOLDS: Dict[SkinDepth, int] = {
@@ -16,14 +16,26 @@ Author: GlowMatch Development Team
 Version: 1.0.0
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import copy
+import hashlib
 import io
-from PIL import Image
+import os
+import threading
+import cv2
 import numpy as np
+import orjson
+import time
 from app.ml_service import SkinToneAnalyzer
 from datetime import datetime
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
 import logging
 
 # Configure logging
@@ -33,88 +45,542 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# OpenCV parallelizes cvtColor, inRange, morphology and the masked
+# reductions across this many threads (parallel_for_ backend). Keep
+# workers x threads at or below the core count to avoid oversubscription.
+OPENCV_THREADS = int(os.getenv("OPENCV_THREADS", str(min(4, os.cpu_count() or 1))))
+cv2.setNumThreads(OPENCV_THREADS)
+
+# Upload limits
+ALLOWED_CONTENT_TYPES = frozenset({'image/jpeg', 'image/png', 'image/jpg'})
+MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB in bytes
+UPLOAD_CHUNK_SIZE = 64 * 1024    # Bytes per read when the upload size is unknown
+# Room for multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+MAX_BATCH_FILES = 10             # Files accepted by /analyze-skin-batch
+
+# Analysis results are cached by content hash so re-uploading the same
+# photo skips decoding and analysis entirely (least recently used evicted)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+_result_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+# Uvicorn worker processes, each with its own analyzer. By default as many
+# as fit next to OPENCV_THREADS without oversubscribing the cores
+WEB_CONCURRENCY = int(os.getenv(
+    "WEB_CONCURRENCY",
+    str(max(1, (os.cpu_count() or 1) // OPENCV_THREADS))
+))
+
+# Decoding and analysis run in the threadpool, off the event loop; at most
+# this many requests are processed at once per worker so bursts queue up
+# instead of oversubscribing CPU and memory. The default keeps
+# workers x analyses x OpenCV threads at or below the core count
+ANALYSIS_CONCURRENCY = int(os.getenv(
+    "ANALYSIS_CONCURRENCY",
+    str(max(1, (os.cpu_count() or 1) // (WEB_CONCURRENCY * OPENCV_THREADS)))
+))
+_analysis_slots = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+
+# Large JPEGs are decoded at 1/2, 1/4 or 1/8 scale (libjpeg-turbo scales in
+# the DCT domain, skipping most of the IDCT work) as long as the decoded
+# image keeps at least this many pixels on its longest side
+DECODE_MIN_DIMENSION = 800
+_JPEG_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+# File signatures of the accepted formats (JPEG SOI + marker, PNG magic)
+_IMAGE_SIGNATURES = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n")
+# Start-of-frame markers (baseline, progressive, lossless, arithmetic)
+_JPEG_SOF_MARKERS = frozenset({
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+})
+
 # Initialize FastAPI application with metadata
 app = FastAPI(
     title="GlowMatch ML Service",
     description="Skin Tone Analysis and Color Recommendation Engine",
     version="1.0.0",
     docs_url="/docs",  # Swagger UI
-    redoc_url="/redoc"  # ReDoc documentation
+    redoc_url="/redoc",  # ReDoc documentation
+    # orjson serializes the nested analysis response several times faster
+    # than the stdlib json encoder used by the default JSONResponse
+    default_response_class=ORJSONResponse
+)
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized uploads from their Content-Length header.
+    
+    FastAPI parses the whole multipart body before the endpoint runs, so
+    the size check in analyze_skin only happens after the upload has been
+    received and spooled. This ASGI middleware answers 413 before a single
+    body byte is read. Requests without a Content-Length (chunked uploads)
+    pass through and are limited by the endpoint's own check.
+    """
+    
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits  # Maximum body size in bytes, by request path
+    
+    async def __call__(self, scope, receive, send):
+        max_body_size = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_body_size is not None and scope["method"] == "POST":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > max_body_size:
+                        logger.warning("Request body too large: %s bytes", int(value))
+                        response = ORJSONResponse(
+                            status_code=413,
+                            content={"detail": "File size exceeds 5MB limit"}
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+# Added before CORS so CORSMiddleware stays outermost and 413s keep CORS headers
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/analyze-skin": MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+        "/analyze-skin-batch": MAX_BATCH_FILES * (MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+    }
 )
 
 # Configure CORS (Cross-Origin Resource Sharing) to allow requests from frontend
 # This allows the Angular frontend (http://localhost:4200) to communicate with
 # this Python service (http://localhost:8001)
+# Explicit origins let the middleware send a fixed Allow-Origin header instead
+# of echoing each request's Origin (required for "*" with credentials), and
+# browsers may cache preflight responses for max_age seconds
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:4200").split(",")
+    if origin.strip()
+]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify exact origins like ["http://localhost:4200"]
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],  # Allows GET, POST, PUT, DELETE, OPTIONS
-    allow_headers=["*"],  # Allows all headers
+    allow_methods=["GET", "POST"],   # The only methods this service serves
+    allow_headers=["Content-Type"],  # multipart/form-data uploads
+    max_age=86400,                   # Cache preflights for a day
 )
 
-# Initialize the Skin Tone Analyzer on service startup
-analyzer = SkinToneAnalyzer()
-logger.info("SkinToneAnalyzer initialized successfully")
-
-# Helper function to get hex color based on skin tone
-def _get_hex_color(depth: str, undertone: str) -> str:
-    """Get representative hex color for skin tone."""
-    color_map = {
-        "Fair-Warm": "#F5D7C3",
-        "Fair-Cool": "#F5E6D3",
-        "Fair-Neutral": "#F5DCC8",
-        "Medium-Warm": "#D4A574",
-        "Medium-Cool": "#C9A57B",
-        "Medium-Neutral": "#CD9A68",
-        "Dark-Warm": "#8D5524",
-        "Dark-Cool": "#8B6342",
-        "Dark-Neutral": "#704214"
+# Representative hex color for each skin tone category
+SKIN_TONE_HEX_COLORS = MappingProxyType({
+    ("Fair", "Warm"): "#F5D7C3",
+    ("Fair", "Cool"): "#F5E6D3",
+    ("Fair", "Neutral"): "#F5DCC8",
+    ("Medium", "Warm"): "#D4A574",
+    ("Medium", "Cool"): "#C9A57B",
+    ("Medium", "Neutral"): "#CD9A68",
+    ("Dark", "Warm"): "#8D5524",
+    ("Dark", "Cool"): "#8B6342",
+    ("Dark", "Neutral"): "#704214"
+})
+DEFAULT_SKIN_TONE = ("Medium", "Warm")
+
+
+def _hex_to_rgb(hex_color: str) -> Dict[str, int]:
+    """Convert '#RRGGBB' to an {r, g, b} dict."""
+    return {
+        "r": int(hex_color[1:3], 16),
+        "g": int(hex_color[3:5], 16),
+        "b": int(hex_color[5:7], 16)
+    }
+
+
+# Hex and RGB forms of every skin tone color, parsed once at import
+# instead of on every /analyze-skin request
+_SKIN_TONE_COLORS: Dict[Tuple[str, str], Dict[str, Any]] = {
+    tone: {"hex": hex_color, "rgb": _hex_to_rgb(hex_color)}
+    for tone, hex_color in SKIN_TONE_HEX_COLORS.items()
+}
+
+
+@lru_cache(maxsize=None)
+def get_analyzer() -> SkinToneAnalyzer:
+    """
+    Get the process-wide SkinToneAnalyzer, creating it on first use.
+    
+    Created from the startup event rather than at import, so each uvicorn
+    worker process loads the MediaPipe model once, after it has started,
+    and importing this module stays cheap. Its detector pool has one slot
+    per analysis slot of this worker; more could never be in use at once.
+    """
+    analyzer = SkinToneAnalyzer(detector_pool_size=ANALYSIS_CONCURRENCY)
+    logger.info("SkinToneAnalyzer initialized successfully")
+    return analyzer
+
+
+def _get_tone_colors(depth: str, undertone: str) -> Dict[str, Any]:
+    """Get representative hex and RGB colors for a skin tone."""
+    return _SKIN_TONE_COLORS.get((depth, undertone), _SKIN_TONE_COLORS[DEFAULT_SKIN_TONE])
+
+
+def _jpeg_dimensions(data: memoryview) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a JPEG's start-of-frame header without decoding.
+    
+    Walks the marker segments until the first SOF marker. Returns None for
+    anything that is not a well-formed JPEG so the caller can fall back to
+    a regular full-size decode.
+    """
+    if data[:2] != b"\xff\xd8":
+        return None
+    
+    i, n = 2, len(data)
+    while i + 9 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers carry no length field
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    
+    return None
+
+
+def _invalid_image_data() -> HTTPException:
+    """Build the 400 raised for uploads that are not a decodable JPEG/PNG."""
+    return HTTPException(
+        status_code=400,
+        detail="Invalid image data: file could not be decoded as JPEG or PNG"
+    )
+
+
+def _decode_image(data: memoryview) -> Tuple[Optional[np.ndarray], int]:
+    """
+    Decode an uploaded JPEG/PNG into a BGR array, shrinking large JPEGs for free.
+    
+    OpenCV handles almost every upload; Pillow is only tried when
+    cv2.imdecode gives up (uncommon JPEG modes and encoder quirks).
+    
+    Args:
+        data (memoryview): Encoded image bytes
+    
+    Returns:
+        Tuple[Optional[np.ndarray], int]: (BGR image, or None if the data could
+            not be decoded; linear factor the image was shrunk by, 1 for a
+            full-size decode)
+    """
+    encoded = np.frombuffer(data, dtype=np.uint8)
+    
+    flags, scale = cv2.IMREAD_COLOR, 1
+    dimensions = _jpeg_dimensions(data)
+    if dimensions is not None:
+        longest = max(dimensions)
+        for factor, reduced_flags in _JPEG_REDUCED_DECODE_FLAGS:
+            if longest // factor >= DECODE_MIN_DIMENSION:
+                flags, scale = reduced_flags, factor
+                logger.debug("Decoding %dx%d JPEG at 1/%d scale", dimensions[0], dimensions[1], factor)
+                break
+    
+    image_bgr = cv2.imdecode(encoded, flags)
+    if image_bgr is None:
+        # Pillow always decodes at full size
+        return _decode_with_pil(data), 1
+    return image_bgr, scale
+
+
+def _decode_with_pil(data: memoryview) -> Optional[np.ndarray]:
+    """
+    Fallback decoder for images OpenCV could not read.
+    
+    Pillow is imported here rather than at module level so it stays off the
+    normal request path.
+    
+    Args:
+        data (memoryview): Encoded image bytes
+    
+    Returns:
+        Optional[np.ndarray]: BGR image, or None if Pillow cannot decode it either
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # Let libjpeg output RGB directly (no-op for other formats) and
+            # only convert when the decoded mode still differs
+            image.draft('RGB', image.size)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            image_rgb = np.asarray(image)
+    except Exception:
+        return None
+    
+    logger.debug("Image decoded with Pillow fallback")
+    return cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
+
+
+def _file_too_large() -> HTTPException:
+    """Build the 413 raised for uploads over MAX_FILE_SIZE."""
+    logger.warning("File too large: more than %d bytes", MAX_FILE_SIZE)
+    return HTTPException(
+        status_code=413,
+        detail="File size exceeds 5MB limit"
+    )
+
+
+async def _read_upload(file: UploadFile) -> memoryview:
+    """
+    Read an uploaded file into memory, enforcing MAX_FILE_SIZE.
+    
+    The multipart parser records the size of each spooled upload, so in the
+    usual case an oversized file is rejected before any of it is read and
+    the rest is read with a single call. Without a known size the upload is
+    copied chunk by chunk and rejected as soon as it crosses the limit.
+    
+    Args:
+        file (UploadFile): Uploaded file
+    
+    Returns:
+        memoryview: The file contents
+    
+    Raises:
+        HTTPException: 413 if the file exceeds MAX_FILE_SIZE
+    """
+    size = file.size
+    if size is not None:
+        if size > MAX_FILE_SIZE:
+            raise _file_too_large()
+        # Uploads over 1MB are spooled to disk, so read off the event loop.
+        # SpooledTemporaryFile only gained readinto in Python 3.11, and the
+        # image runs 3.10, so this is a plain read
+        data = await run_in_threadpool(file.file.read, size)
+        return memoryview(data)
+    
+    data = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(data) + len(chunk) > MAX_FILE_SIZE:
+            raise _file_too_large()
+        data += chunk
+    return memoryview(data)
+
+
+def _get_cached_result(digest: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Return a copy of the cached analysis for an image digest, marking it recently used.
+    
+    Each caller gets its own copy, so changing a result can never leak
+    into the answers for later uploads of the same image.
+    """
+    with _result_cache_lock:
+        results = _result_cache.get(digest)
+        if results is None:
+            return None
+        _result_cache.move_to_end(digest)
+    return copy.deepcopy(results)
+
+
+def _cache_result(digest: bytes, results: Dict[str, Any]) -> None:
+    """Store a copy of an analysis result, evicting the least recently used entries."""
+    if RESULT_CACHE_SIZE <= 0:
+        return
+    results = copy.deepcopy(results)
+    with _result_cache_lock:
+        _result_cache[digest] = results
+        _result_cache.move_to_end(digest)
+        while len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+
+
+def _run_pipeline(image_data: memoryview, filename: Optional[str]) -> Dict[str, Any]:
+    """
+    Decode and analyze an uploaded image (blocking; run in the threadpool).
+    
+    Args:
+        image_data (memoryview): Encoded image bytes
+        filename (Optional[str]): Upload filename, for logging
+    
+    Returns:
+        Dict[str, Any]: Analysis results from SkinToneAnalyzer
+    
+    Raises:
+        HTTPException: 400 if the image cannot be decoded
+    """
+    # Reuse the previous analysis if this exact image was seen
+    # The digest is computed once, so the cache never hashes the raw bytes
+    digest = hashlib.blake2b(image_data, digest_size=16).digest()
+    results = _get_cached_result(digest)
+    if results is not None:
+        logger.debug("Using cached analysis for: %s", filename)
+        return results
+    
+    # Decode bytes straight into a BGR numpy array
+    # cv2.imdecode reads the buffer in place (no extra copy) and decodes
+    # via libjpeg-turbo/libpng; IMREAD_COLOR also flattens RGBA and
+    # grayscale images to 3 channels, so no separate mode conversion.
+    # Pillow is only used if OpenCV rejects the file
+    logger.debug("Decoding image with OpenCV")
+    image_bgr, decode_scale = _decode_image(image_data)
+    if image_bgr is None:
+        logger.warning("Could not decode image: %s", filename)
+        raise _invalid_image_data()
+    logger.debug("Image loaded successfully: %dx%d", image_bgr.shape[1], image_bgr.shape[0])
+    
+    # Call ML service for analysis
+    # This performs all the heavy lifting: face detection, skin analysis, etc.
+    # The BGR entry point skips the RGB -> BGR conversion; the decode scale
+    # lets it count skin pixels at the resolution of the uploaded photo
+    logger.info("Starting skin tone analysis for: %s", filename)
+    results = get_analyzer().analyze_skin_tone_bgr(image_bgr, decode_scale=decode_scale)
+    
+    # Only successful analyses are cached; errors may be transient
+    if results.get("status") != "error":
+        _cache_result(digest, results)
+    return results
+
+
+# The root response never changes, so it is serialized once at import
+_ROOT_BODY = orjson.dumps({
+    "message": "Welcome to GlowMatch ML Service",
+    "version": "1.0.0",
+    "endpoints": {
+        "health": "/health",
+        "analyze_skin": "/analyze-skin (POST)",
+        "analyze_skin_batch": "/analyze-skin-batch (POST)",
+        "docs": "/docs - Swagger Interactive API Documentation",
+        "redoc": "/redoc - ReDoc API Documentation"
     }
-    return color_map.get(f"{depth}-{undertone}", "#D4A574")
-
-def _get_rgb_color(depth: str, undertone: str) -> dict:
-    """Get RGB values for skin tone."""
-    hex_color = _get_hex_color(depth, undertone)
-    # Convert hex to RGB
-    hex_color = hex_color.lstrip('#')
-    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    return {"r": r, "g": g, "b": b}
-
-# Helper function to get hex color based on skin tone
-def _get_hex_color(depth: str, undertone: str) -> str:
-    """Get representative hex color for skin tone."""
-    color_map = {
-        "Fair-Warm": "#F5D7C3",
-        "Fair-Cool": "#F5E6D3",
-        "Fair-Neutral": "#F5DCC8",
-        "Medium-Warm": "#D4A574",
-        "Medium-Cool": "#C9A57B",
-        "Medium-Neutral": "#CD9A68",
-        "Dark-Warm": "#8D5524",
-        "Dark-Cool": "#8B6342",
-        "Dark-Neutral": "#704214"
+})
+# Lets polling clients revalidate with If-None-Match and get a bodiless 304
+_ROOT_ETAG = '"' + hashlib.md5(_ROOT_BODY, usedforsecurity=False).hexdigest() + '"'
+_ROOT_HEADERS = {"ETag": _ROOT_ETAG, "Cache-Control": "public, max-age=3600"}
+
+
+def _validate_content_type(file: UploadFile) -> None:
+    """
+    Only accept JPEG and PNG image formats.
+    
+    Raises:
+        HTTPException: 400 for any other content type
+    """
+    if file.content_type not in ALLOWED_CONTENT_TYPES:
+        logger.warning("Invalid file type received: %s", file.content_type)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type: {file.content_type}. Allowed types: JPEG, PNG"
+        )
+
+
+async def _analyze_upload(file: UploadFile) -> Dict[str, Any]:
+    """
+    Validate, read, decode and analyze one uploaded image.
+    
+    Args:
+        file (UploadFile): Uploaded image
+    
+    Returns:
+        Dict[str, Any]: Analysis results from SkinToneAnalyzer
+    
+    Raises:
+        HTTPException: 400 for invalid files, 413 for oversized files
+    """
+    # Validate file type
+    _validate_content_type(file)
+    
+    # Validate size and read file data into memory
+    # Oversized files are rejected from the recorded upload size before
+    # reading; otherwise the bytes go straight into one numpy buffer
+    logger.debug("Reading file: %s", file.filename)
+    image_data = await _read_upload(file)
+    
+    # Reject anything that is not JPEG/PNG data from its signature, before
+    # paying for a threadpool hop and a failing decoder call
+    if not bytes(image_data[:8]).startswith(_IMAGE_SIGNATURES):
+        logger.warning("Not JPEG or PNG data: %s", file.filename)
+        raise _invalid_image_data()
+    
+    # Decode and analyze in the threadpool
+    # Face detection and analysis take hundreds of milliseconds of CPU;
+    # running them off the event loop keeps other requests responsive
+    async with _analysis_slots:
+        return await run_in_threadpool(_run_pipeline, image_data, file.filename)
+
+
+def _build_response(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape analyzer results into the camelCase response sent to the backend."""
+    # Each nested result dict is looked up once and read through locals
+    skin_analysis = results["skin_analysis"]
+    details = results["analysis_details"]
+    depth = skin_analysis["depth"]
+    undertone = skin_analysis["undertone"]
+    tone_colors = _get_tone_colors(depth, undertone)
+    return {
+        "success": True,
+        "message": "Skin tone analysis completed successfully",
+        "skinAnalysis": {
+            "depth": depth,
+            "undertone": undertone,
+            "skinToneCategory": f"{depth}-{undertone}",
+            "hexColor": tone_colors["hex"],
+            "rgbColor": tone_colors["rgb"],
+            "hsvColor": {
+                "h": details["hue"],
+                "s": details["saturation"],
+                "v": details["brightness"]
+            }
+        },
+        "recommendations": results["recommendations"],
+        "analysisDetails": {
+            "processingTime": "< 1s",
+            "faceDetectionMethod": "MediaPipe Face Detection",
+            # A string, as AnalysisDetails.confidence declares in the backend
+            # and frontend models
+            "confidence": str(skin_analysis["confidence"])
+        }
     }
-    return color_map.get(f"{depth}-{undertone}", "#D4A574")
 
-def _get_rgb_color(depth: str, undertone: str) -> dict:
-    """Get RGB values for skin tone."""
-    hex_color = _get_hex_color(depth, undertone)
-    # Convert hex to RGB
-    hex_color = hex_color.lstrip('#')
-    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    return {"r": r, "g": g, "b": b}
+
+@lru_cache(maxsize=1)
+def _timestamp_for_second(second: int) -> str:
+    """Format a Unix second as an ISO timestamp (cached for the current second)."""
+    return datetime.fromtimestamp(second).isoformat()
+
+
+def _now_iso() -> str:
+    """
+    Current local time as an ISO timestamp, at second resolution.
+    
+    Every response timestamp goes through here, so all requests within the
+    same wall-clock second share one formatted string.
+    """
+    return _timestamp_for_second(int(time.time()))
 
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """
     Root endpoint - Welcome message and service information.
     
     Provides basic information about the service and available endpoints.
     
     Returns:
-        dict: Service information with available endpoints
+        Response: Service information with available endpoints (pre-serialized JSON),
+                  or 304 Not Modified when If-None-Match matches the ETag
         
     Example:
         GET http://localhost:8001/
@@ -130,17 +596,15 @@ async def root():
             }
         }
     """
-    logger.info("Root endpoint accessed")
-    return {
-        "message": "Welcome to GlowMatch ML Service",
-        "version": "1.0.0",
-        "endpoints": {
-            "health": "/health",
-            "analyze_skin": "/analyze-skin (POST)",
-            "docs": "/docs - Swagger Interactive API Documentation",
-            "redoc": "/redoc - ReDoc API Documentation"
-        }
-    }
+    logger.debug("Root endpoint accessed")
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match uses weak comparison, so a W/"..." validator sent
+        # back by a proxy or browser matches the strong ETag too
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if _ROOT_ETAG in tags or "*" in tags:
+            return Response(status_code=304, headers=_ROOT_HEADERS)
+    return Response(content=_ROOT_BODY, media_type="application/json", headers=_ROOT_HEADERS)
 
 
 @app.get("/health")
@@ -164,15 +628,15 @@ async def health_check():
             "status": "healthy",
             "service": "Skin Tone Analysis ML Service",
             "version": "1.0.0",
-            "timestamp": "2024-01-02T10:30:00.123456"
+            "timestamp": "2024-01-02T10:30:00"
         }
     """
-    logger.info("Health check performed")
+    logger.debug("Health check performed")
     return {
         "status": "healthy",
         "service": "Skin Tone Analysis ML Service",
         "version": "1.0.0",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _now_iso()
     }
 
 
@@ -188,13 +652,12 @@ async def analyze_skin(file: UploadFile = File(...)):
     Processing Pipeline:
     1. Validate file type (JPEG/PNG only)
     2. Check file size (max 5MB)
-    3. Load image using PIL
-    4. Convert to appropriate color space
-    5. Detect face using MediaPipe
-    6. Extract skin region from detected face
-    7. Analyze skin tone (depth and undertone)
-    8. Generate personalized color recommendations
-    9. Return comprehensive JSON response
+    3. Decode image into a BGR array using OpenCV (Pillow fallback)
+    4. Detect face using MediaPipe
+    5. Extract skin region from detected face
+    6. Analyze skin tone (depth and undertone)
+    7. Generate personalized color recommendations
+    8. Return comprehensive JSON response
     
     Args:
         file (UploadFile): Image file from client
@@ -258,76 +721,22 @@ async def analyze_skin(file: UploadFile = File(...)):
         }
     """
     try:
-        # Step 1: Validate file type
-        # Only accept JPEG and PNG image formats
-        allowed_types = ['image/jpeg', 'image/png', 'image/jpg']
-        if file.content_type not in allowed_types:
-            logger.warning(f"Invalid file type received: {file.content_type}")
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type: {file.content_type}. Allowed types: JPEG, PNG"
-            )
+        # Step 1-6: Validate type and size, read, decode and analyze
+        results = await _analyze_upload(file)
         
-        # Step 2: Read file data into memory
-        logger.info(f"Reading file: {file.filename}")
-        image_data = await file.read()
-        
-        # Step 3: Validate file size (max 5MB = 5,242,880 bytes)
-        max_file_size = 5 * 1024 * 1024  # 5MB in bytes
-        if len(image_data) > max_file_size:
-            logger.warning(f"File too large: {len(image_data)} bytes")
+        # Analyzer failures (no face, too little skin) are expected outcomes,
+        # reported without going through the traceback-logging handler below
+        if results.get("status") == "error":
+            logger.warning("Analysis failed for %s: %s", file.filename, results["message"])
             raise HTTPException(
-                status_code=413,
-                detail=f"File size {len(image_data)} bytes exceeds 5MB limit"
+                status_code=422,
+                detail=f"Error processing image: {results['message']}"
             )
         
-        # Step 4: Convert bytes to PIL Image
-        # PIL is used for safe image format handling and conversion
-        logger.info(f"Converting image to PIL format")
-        image = Image.open(io.BytesIO(image_data))
-        
-        # Step 5: Handle different image modes
-        # Convert RGBA, grayscale, etc. to RGB format that OpenCV expects
-        if image.mode != 'RGB':
-            logger.info(f"Converting image from {image.mode} to RGB")
-            image = image.convert('RGB')
-        
-        # Step 6: Convert PIL Image to numpy array for OpenCV processing
-        # Note: PIL uses RGB, but numpy/OpenCV typically work with arrays
-        image_array = np.array(image)
-        logger.info(f"Image loaded successfully: {image.size}, Mode: {image.mode}")
-        
-        # Step 7: Call ML service for analysis
-        # This performs all the heavy lifting: face detection, skin analysis, etc.
-        logger.info(f"Starting skin tone analysis for: {file.filename}")
-        results = analyzer.analyze_skin_tone(image_array)
-        
-        # Step 8: Return success response
-        # Include filename and timestamp for reference
-        response = {
-            "success": True,
-            "message": "Skin tone analysis completed successfully",
-            "skinAnalysis": {
-                "depth": results["skin_analysis"]["depth"],
-                "undertone": results["skin_analysis"]["undertone"],
-                "skinToneCategory": f"{results['skin_analysis']['depth']}-{results['skin_analysis']['undertone']}",
-                "hexColor": _get_hex_color(results["skin_analysis"]["depth"], results["skin_analysis"]["undertone"]),
-                "rgbColor": _get_rgb_color(results["skin_analysis"]["depth"], results["skin_analysis"]["undertone"]),
-                "hsvColor": {
-                    "h": results["analysis_details"]["hue"],
-                    "s": results["analysis_details"]["saturation"],
-                    "v": results["analysis_details"]["brightness"]
-                }
-            },
-            "recommendations": results["recommendations"],
-            "analysisDetails": {
-                "processingTime": "< 1s",
-                "faceDetectionMethod": "MediaPipe Face Detection",
-                "confidence": str(results["skin_analysis"]["confidence"])
-            }
-        }
+        # Step 7: Return success response
+        response = _build_response(results)
         
-        logger.info(f"Analysis complete for {file.filename}")
+        logger.info("Analysis complete for %s", file.filename)
         return response
         
     except HTTPException:
@@ -343,17 +752,63 @@ async def analyze_skin(file: UploadFile = File(...)):
         )
 
 
+@app.post("/analyze-skin-batch")
+async def analyze_skin_batch(files: List[UploadFile] = File(...)):
+    """
+    Analyze several face images in one request.
+    
+    Each file goes through the same pipeline as /analyze-skin. Files are
+    processed concurrently, bounded by the same analysis slots, so a batch
+    keeps every CPU busy without starving single-image requests.
+    
+    Args:
+        files (List[UploadFile]): Up to MAX_BATCH_FILES JPEG/PNG images,
+                                  each at most 5MB
+    
+    Returns:
+        dict: {"success": true, "count": int, "results": [...]} where each
+        result is the /analyze-skin response plus "filename", or
+        {"filename", "success": false, "message"} if that file failed
+    
+    Status Codes:
+        200 OK: Batch processed (check each result's "success")
+        400 Bad Request: More than MAX_BATCH_FILES files
+        413 Payload Too Large: Request body exceeds the batch limit
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files: {len(files)}. Maximum per batch: {MAX_BATCH_FILES}"
+        )
+    
+    async def analyze_one(file: UploadFile) -> Dict[str, Any]:
+        try:
+            results = await _analyze_upload(file)
+            if results.get("status") == "error":
+                return {"filename": file.filename, "success": False, "message": results["message"]}
+            return {"filename": file.filename, **_build_response(results)}
+        except HTTPException as e:
+            return {"filename": file.filename, "success": False, "message": e.detail}
+        except Exception as e:
+            logger.error(f"Error analyzing image {file.filename}: {str(e)}", exc_info=True)
+            return {"filename": file.filename, "success": False, "message": f"Error processing image: {str(e)}"}
+    
+    results = await asyncio.gather(*(analyze_one(file) for file in files))
+    logger.info("Batch analysis complete for %d file(s)", len(results))
+    return {"success": True, "count": len(results), "results": results}
+
+
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
     """Handle 404 Not Found errors with custom JSON response."""
-    logger.warning(f"404 Not Found: {request.url.path}")
-    return JSONResponse(
+    logger.warning("404 Not Found: %s", request.url.path)
+    return ORJSONResponse(
         status_code=404,
         content={
             "status": "error",
             "error": "NOT_FOUND",
             "message": f"Endpoint not found: {request.url.path}",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
     )
 
@@ -362,13 +817,13 @@ async def not_found_handler(request, exc):
 async def server_error_handler(request, exc):
     """Handle 500 Internal Server Error with custom JSON response."""
     logger.error(f"500 Server Error on {request.url.path}: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "status": "error",
             "error": "INTERNAL_SERVER_ERROR",
             "message": "An unexpected error occurred. Please try again later.",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
     )
 
@@ -384,10 +839,23 @@ async def startup_event():
     - Initializing connections
     - Printing startup messages
     """
+    # Load the analyzer (and its MediaPipe model) before the first request
+    analyzer = get_analyzer()
+    
+    # Build one pooled detector and run a throwaway inference through it, so
+    # MediaPipe loads its model and allocates its tensors and XNNPACK kernels
+    # now, in this worker, instead of on the first upload
+    try:
+        analyzer.warm_up()
+        logger.info("Face detector warmed up")
+    except Exception as e:
+        logger.warning("Face detector warm-up failed: %s", e)
+    
     logger.info("=" * 60)
     logger.info("🎨 GlowMatch ML Service Starting")
     logger.info("=" * 60)
     logger.info(f"Service Version: 1.0.0")
+    logger.info(f"OpenCV threads: {cv2.getNumThreads()}")
     logger.info(f"API Documentation: http://localhost:8001/docs")
     logger.info(f"Health Check: http://localhost:8001/health")
     logger.info("=" * 60)
@@ -412,14 +880,23 @@ if __name__ == "__main__":
     # Import uvicorn for running the server
     import uvicorn
     
+    # Auto-reload on file changes is for development only (DEBUG=True);
+    # it runs a file-watcher supervisor and cannot be combined with workers
+    debug = os.getenv("DEBUG", "False").lower() in ("1", "true", "yes")
+    
     # Run the FastAPI application
     # host="0.0.0.0" means listen on all network interfaces
     # port=8001 is the port number
-    # reload=True enables auto-reload on file changes (development only)
+    # The app is passed as an import string so reload and workers can
+    # re-import it in child processes
+    # loop and http stay at uvicorn's "auto": uvloop and httptools (from
+    # uvicorn[standard]) are used where installed, and the asyncio loop and
+    # h11 elsewhere, e.g. Windows, where uvloop is never installed
     uvicorn.run(
-        app,
+        "app.main:app",
         host="0.0.0.0",
         port=8001,
-        reload=True,
+        reload=debug,
+        workers=1 if debug else WEB_CONCURRENCY,
         log_level="info"
     )
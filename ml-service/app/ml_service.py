@@ -18,7 +18,13 @@ Version: 1.0.0
 import cv2
 import numpy as np
 import logging
-from typing import Dict, List, Tuple, Any
+import os
+import queue
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple, Any
 
 # Try importing mediapipe solutions
 try:
@@ -35,6 +41,195 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+# Predefined color palettes, keyed by (depth, undertone)
+# Shared by every SkinToneAnalyzer; module-level so they are built once
+COLOR_PALETTES: Dict[Tuple[str, str], Dict[str, Any]] = {
+    # ========== FAIR SKIN (Light) ==========
+
+    # Fair + Warm: Golden undertones look best
+    ('Fair', 'Warm'): {
+        'clothing': ['#FFB347', '#FF8C00', '#CD853F', '#DEB887', '#F4A460', '#DAA520'],
+        'makeup': {
+            'foundation': ['#F5DEB3', '#FFE4B5', '#FFDAB9'],
+            'lipstick': ['#FF6347', '#FF7F50', '#E75480'],
+            'eyeshadow': ['#FFD700', '#FFA500', '#FF8C00']
+        },
+        'jewelry': {
+            'metals': ['#FFD700', '#B76E79'],  # Gold, Rose Gold
+            'stones': ['#FF8C00', '#DAA520']   # Amber, Topaz
+        }
+    },
+
+    # Fair + Cool: Silver and cool tones look best
+    ('Fair', 'Cool'): {
+        'clothing': ['#4B0082', '#00CED1', '#E0FFFF', '#B0E0E6', '#ADD8E6', '#87CEEB'],
+        'makeup': {
+            'foundation': ['#E8E8E8', '#F5F5DC', '#FFFAFA'],
+            'lipstick': ['#FF1493', '#FF69B4', '#8B0000'],
+            'eyeshadow': ['#4B0082', '#8A2BE2', '#00CED1']
+        },
+        'jewelry': {
+            'metals': ['#C0C0C0', '#E8E8E8'],  # Silver, Platinum
+            'stones': ['#00CED1', '#FF69B4']   # Turquoise, Pink
+        }
+    },
+
+    # Fair + Neutral: Both warm and cool colors work
+    ('Fair', 'Neutral'): {
+        'clothing': ['#DC143C', '#FF0000', '#FFFFFF', '#000000', '#808080', '#A9A9A9'],
+        'makeup': {
+            'foundation': ['#F5DEB3', '#FAEBD7', '#F0F8FF'],
+            'lipstick': ['#DC143C', '#C71585', '#FF6347'],
+            'eyeshadow': ['#8B008B', '#FF0000', '#006666']
+        },
+        'jewelry': {
+            'metals': ['#FFD700', '#C0C0C0'],  # Gold, Silver - both work
+            'stones': ['#FF0000', '#006666']   # Ruby, Emerald
+        }
+    },
+
+    # ========== MEDIUM SKIN (Mid-tone) ==========
+
+    # Medium + Warm: Warm, earthy tones
+    ('Medium', 'Warm'): {
+        'clothing': ['#8B4513', '#D2691E', '#CD853F', '#FF8C00', '#FFB347', '#DAA520'],
+        'makeup': {
+            'foundation': ['#C9A877', '#D4A574', '#DEB887'],
+            'lipstick': ['#E75480', '#FF6347', '#FF8C00'],
+            'eyeshadow': ['#8B4513', '#CD853F', '#FFD700']
+        },
+        'jewelry': {
+            'metals': ['#FFD700', '#B76E79'],  # Gold, Rose Gold
+            'stones': ['#8B4513', '#FFD700']   # Bronze, Gold
+        }
+    },
+
+    # Medium + Cool: Cool, jewel tones
+    ('Medium', 'Cool'): {
+        'clothing': ['#4B0082', '#008080', '#20B2AA', '#3CB371', '#66CDAA', '#00FA9A'],
+        'makeup': {
+            'foundation': ['#C9A877', '#BC8F8F', '#A0826D'],
+            'lipstick': ['#8B008B', '#FF1493', '#00CED1'],
+            'eyeshadow': ['#483D8B', '#4169E1', '#00CED1']
+        },
+        'jewelry': {
+            'metals': ['#C0C0C0', '#E8E8E8'],  # Silver, Platinum
+            'stones': ['#00CED1', '#50C878']   # Turquoise, Emerald
+        }
+    },
+
+    # Medium + Neutral: Versatile, works with both warm and cool
+    ('Medium', 'Neutral'): {
+        'clothing': ['#50C878', '#DC143C', '#FF4500', '#228B22', '#FFD700', '#FF6347'],
+        'makeup': {
+            'foundation': ['#C9A877', '#D4A574', '#BC8F8F'],
+            'lipstick': ['#DC143C', '#FF4500', '#C71585'],
+            'eyeshadow': ['#50C878', '#FFD700', '#FF4500']
+        },
+        'jewelry': {
+            'metals': ['#FFD700', '#B76E79'],  # Gold, Rose Gold - both versatile
+            'stones': ['#50C878', '#FF4500']   # Emerald, Orange
+        }
+    },
+
+    # ========== DARK SKIN (Deep) ==========
+
+    # Dark + Warm: Vibrant warm colors pop
+    ('Dark', 'Warm'): {
+        'clothing': ['#FFD700', '#FFA500', '#FF8C00', '#FF6347', '#DC143C', '#8B4513'],
+        'makeup': {
+            'foundation': ['#8B4513', '#A0522D', '#8B6914'],
+            'lipstick': ['#FF4500', '#FF6347', '#DC143C'],
+            'eyeshadow': ['#FFD700', '#FFA500', '#FF8C00']
+        },
+        'jewelry': {
+            'metals': ['#FFD700', '#B76E79'],  # Gold, Rose Gold
+            'stones': ['#FFD700', '#FF4500']   # Gold, Deep Orange
+        }
+    },
+
+    # Dark + Cool: Cool, bright colors stand out
+    ('Dark', 'Cool'): {
+        'clothing': ['#00CED1', '#87CEEB', '#00FA9A', '#20B2AA', '#FF1493', '#FF69B4'],
+        'makeup': {
+            'foundation': ['#3D3D3D', '#545454', '#696969'],
+            'lipstick': ['#FF1493', '#FF69B4', '#00CED1'],
+            'eyeshadow': ['#00CED1', '#87CEEB', '#FF1493']
+        },
+        'jewelry': {
+            'metals': ['#C0C0C0', '#E8E8E8'],  # Silver, Platinum
+            'stones': ['#00CED1', '#FF1493']   # Turquoise, Hot Pink
+        }
+    },
+
+    # Dark + Neutral: Both warm and cool colors work beautifully
+    ('Dark', 'Neutral'): {
+        'clothing': ['#50C878', '#FFD700', '#FF4500', '#00CED1', '#FF1493', '#DC143C'],
+        'makeup': {
+            'foundation': ['#704214', '#8B6914', '#A0522D'],
+            'lipstick': ['#FF4500', '#DC143C', '#FF1493'],
+            'eyeshadow': ['#50C878', '#FFD700', '#FF4500']
+        },
+        'jewelry': {
+            'metals': ['#FFD700', '#C0C0C0'],  # Gold and Silver both work
+            'stones': ['#50C878', '#FFD700']   # Emerald, Gold
+        }
+    }
+}
+
+
+# Display names for the hex codes used in COLOR_PALETTES; palette colors
+# without an entry are shown as 'Color' (or 'Metal' for jewelry metals).
+# Keys are uppercase, lookups upper-case the hex code first. Read-only, like
+# the tone colors in main.py
+COLOR_NAMES: Mapping[str, str] = MappingProxyType({
+    '#FFB347': 'Peach', '#FF8C00': 'Dark Orange', '#CD853F': 'Peru',
+    '#DEB887': 'Burlywood', '#F4A460': 'Sandy Brown', '#DAA520': 'Goldenrod',
+    '#8B4513': 'Saddle Brown', '#D2691E': 'Chocolate', '#FF6347': 'Tomato',
+    '#FF7F50': 'Coral', '#E75480': 'Raspberry', '#FFD700': 'Gold',
+    '#FFA500': 'Orange', '#FF4500': 'Orange Red', '#4B0082': 'Indigo',
+    '#00CED1': 'Dark Turquoise', '#E0FFFF': 'Light Cyan', '#B0E0E6': 'Powder Blue',
+    '#ADD8E6': 'Light Blue', '#87CEEB': 'Sky Blue', '#FF1493': 'Deep Pink',
+    '#FF69B4': 'Hot Pink', '#C71585': 'Medium Violet Red', '#8A2BE2': 'Blue Violet',
+    '#C0C0C0': 'Silver', '#E8E8E8': 'Ghost White', '#50C878': 'Emerald',
+    '#008080': 'Teal', '#20B2AA': 'Light Sea Green', '#3CB371': 'Medium Sea Green',
+    '#66CDAA': 'Medium Aquamarine', '#00FA9A': 'Medium Spring Green',
+    '#483D8B': 'Dark Slate Blue', '#4169E1': 'Royal Blue', '#228B22': 'Forest Green',
+    '#DC143C': 'Crimson', '#FF0000': 'Red', '#FFFFFF': 'White', '#000000': 'Black',
+    '#808080': 'Gray', '#A9A9A9': 'Dark Gray', '#B76E79': 'Rose Gold',
+    '#8B6914': 'Dark Yellow', '#A0522D': 'Sienna', '#704214': 'Sepia',
+    '#545454': 'Dark Gray', '#696969': 'Dim Gray', '#3D3D3D': 'Very Dark Gray'
+})
+
+METAL_NAMES: Mapping[str, str] = MappingProxyType({
+    '#FFD700': 'Gold',
+    '#C0C0C0': 'Silver',
+    '#B76E79': 'Rose Gold',
+    '#E8E8E8': 'Platinum'
+})
+
+
+class _DetectorSlot:
+    """
+    One set of face detection state, used by one thread at a time.
+    
+    A MediaPipe graph must not run two images at once, so each slot owns
+    its graphs, the RGB buffer MediaPipe reads from and the Haar Cascade
+    fallback; SkinToneAnalyzer hands slots out from a bounded pool. Slots
+    start empty and build each graph the first time it is needed.
+    """
+    
+    def __init__(self):
+        # Short-range graph, built on the slot's first checkout
+        self.short_range: Optional[Any] = None
+        self.short_range_loaded = False
+        # Full-range graph, built the first time a wide shot needs it
+        self.full_range: Optional[Any] = None
+        self.full_range_loaded = False
+        self.rgb_buffer: Optional[np.ndarray] = None
+        self.cascade: Optional[Any] = None
+
+
 class SkinToneAnalyzer:
     """
     Analyzes skin tone from face images and generates personalized color recommendations.
@@ -56,9 +251,21 @@ class SkinToneAnalyzer:
     # ==================== HSV Color Space Ranges ====================
     # These ranges define what we consider "skin-like" colors
     # OpenCV uses H: 0-180, S: 0-255, V: 0-255 (not 0-360, 0-100, 0-100)
+    # Stored as uint8, the dtype of the HSV image cv2.inRange compares them to
     
-    SKIN_HSV_MIN = np.array([0, 5, 25])      # Lower bound (Hue, Saturation, Value)
-    SKIN_HSV_MAX = np.array([50, 65, 95])    # Upper bound
+    SKIN_HSV_MIN = np.array([0, 5, 25], dtype=np.uint8)    # Lower bound (Hue, Saturation, Value)
+    SKIN_HSV_MAX = np.array([50, 65, 95], dtype=np.uint8)  # Upper bound
+    
+    # Kernel for morphological clean-up of the skin mask (5x5 ellipse)
+    # Built once here rather than on every extraction
+    SKIN_MASK_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    
+    # ==================== Depth Thresholds ====================
+    # Mean V above a threshold moves up one label
+    # Thresholds based on empirical testing with diverse skin tones
+    
+    DEPTH_THRESHOLDS = (115, 166)                # 0.45 * 255, 0.65 * 255
+    DEPTH_LABELS = ('Dark', 'Medium', 'Fair')
     
     # ==================== Undertone Hue Ranges ====================
     # Hue ranges in degrees (0-360), converted to OpenCV scale (0-180)
@@ -67,7 +274,25 @@ class SkinToneAnalyzer:
     NEUTRAL_HUE_RANGE = (35, 60)   # Yellow-Green spectrum (balanced)
     COOL_HUE_RANGE = (340, 360)    # Purple-Red spectrum (cool tones)
     
-    def __init__(self):
+    # ==================== Analysis Resolution ====================
+    # Skin color statistics are computed on an evenly strided sample of the
+    # face whose longest side is at most this many pixels
+    
+    ANALYSIS_MAX_DIMENSION = 256
+    
+    # MediaPipe runs BlazeFace on a 192x192 input, so face detection is fed
+    # a copy no larger than this; boxes come back in relative coordinates
+    
+    DETECTION_MAX_DIMENSION = 640
+    
+    # MediaPipe model_selection values. Uploads are selfies, so the smaller,
+    # faster short-range model (faces within ~2m) runs first; the full-range
+    # model (~5m) only gets a second try when it finds nothing
+    
+    SHORT_RANGE_MODEL = 0
+    FULL_RANGE_MODEL = 1
+    
+    def __init__(self, detector_pool_size: Optional[int] = None):
         """
         Initialize the SkinToneAnalyzer with pre-trained models.
         
@@ -77,30 +302,115 @@ class SkinToneAnalyzer:
         
         The MediaPipe model is loaded from cache on subsequent uses,
         so initialization is fast after the first run.
+        
+        A MediaPipe graph must not run two images at once, so the analyzer
+        keeps a fixed pool of detector slots: each detection checks one out
+        and returns it. Up to detector_pool_size images are detected in
+        parallel and callers beyond that wait. A slot builds its graphs on
+        first use, so only as many graphs exist as analyses ever ran at once.
+        
+        Args:
+            detector_pool_size (Optional[int]): Number of detector slots,
+                i.e. how many analyses can detect faces at once. Defaults to
+                the number of CPU cores; the service passes its per-worker
+                ANALYSIS_CONCURRENCY
         """
         logger.info("Initializing SkinToneAnalyzer...")
         
-        # Initialize MediaPipe Face Detection
-        # model_selection: 0 = short-range (0-2m), 1 = full-range (0-5m)
-        # We use model_selection=1 for robustness
-        if face_detection is None:
-            logger.warning("MediaPipe not available, using fallback face detection")
-            self.face_detector = None
-        else:
-            try:
-                self.face_detector = face_detection.FaceDetection(
-                    model_selection=1,
-                    min_detection_confidence=0.5  # 50% confidence threshold
-                )
-                logger.info("MediaPipe Face Detector loaded successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize MediaPipe: {e}")
-                self.face_detector = None
+        # Bounded pool of detector slots, filled with empty slots
+        self._detector_pool_size = max(1, detector_pool_size or os.cpu_count() or 1)
+        self._detector_pool: "queue.Queue[_DetectorSlot]" = queue.Queue()
+        for _ in range(self._detector_pool_size):
+            self._detector_pool.put(_DetectorSlot())
         
         # Initialize color recommendation palettes
         self._initialize_color_palettes()
         logger.info("Color palettes initialized")
     
+    @property
+    def face_detector(self) -> Optional[Any]:
+        """
+        MediaPipe short-range detector of a pooled slot.
+        
+        None if MediaPipe is unavailable or failed to initialize. For
+        checking availability only: detection checks a slot out of the
+        pool rather than using this graph directly.
+        """
+        with self._checkout_detector() as slot:
+            return self._short_range_detector(slot)
+    
+    @contextmanager
+    def _checkout_detector(self):
+        """
+        Borrow a detector slot from the pool, waiting until one is free.
+        
+        Yields:
+            _DetectorSlot: Slot owned by the caller until the block exits
+        """
+        slot = self._detector_pool.get()
+        try:
+            yield slot
+        finally:
+            self._detector_pool.put(slot)
+    
+    def _short_range_detector(self, slot: _DetectorSlot) -> Optional[Any]:
+        """
+        Short-range detector of a slot, built on the slot's first checkout.
+        """
+        if not slot.short_range_loaded:
+            slot.short_range = self._create_face_detector(self.SHORT_RANGE_MODEL)
+            slot.short_range_loaded = True
+        return slot.short_range
+    
+    def _full_range_detector(self, slot: _DetectorSlot) -> Optional[Any]:
+        """
+        Full-range detector of a slot, built the first time it is needed.
+        
+        Only wide shots where the short-range model finds no face need it,
+        so slots that never see one never load the second graph.
+        """
+        if not slot.full_range_loaded:
+            slot.full_range = self._create_face_detector(self.FULL_RANGE_MODEL)
+            slot.full_range_loaded = True
+        return slot.full_range
+    
+    def warm_up(self) -> None:
+        """
+        Build one pooled short-range detector and run a blank frame through it.
+        
+        Loads the model files and allocates that graph's tensors and XNNPACK
+        kernels before the first request, and puts a broken MediaPipe install
+        in the startup log. The other slots stay empty until concurrent
+        requests need them.
+        """
+        with self._checkout_detector() as slot:
+            face_detector = self._short_range_detector(slot)
+            if face_detector is not None:
+                face_detector.process(np.zeros((256, 256, 3), dtype=np.uint8))
+    
+    def _create_face_detector(self, model_selection: int) -> Optional[Any]:
+        """
+        Build a MediaPipe Face Detection graph, or None if unavailable.
+        
+        Args:
+            model_selection (int): SHORT_RANGE_MODEL or FULL_RANGE_MODEL
+        """
+        # Initialize MediaPipe Face Detection
+        # model_selection: 0 = short-range (0-2m), 1 = full-range (0-5m)
+        if face_detection is None:
+            logger.warning("MediaPipe not available, using fallback face detection")
+            return None
+        try:
+            detector = face_detection.FaceDetection(
+                model_selection=model_selection,
+                min_detection_confidence=0.5  # 50% confidence threshold
+            )
+            logger.info("MediaPipe Face Detector (model %d) loaded successfully", model_selection)
+            return detector
+        except Exception as e:
+            logger.error(f"Failed to initialize MediaPipe: {e}")
+            return None
+    
     def _initialize_color_palettes(self) -> None:
         """
         Initialize predefined color palettes for all 6 skin tone combinations.
@@ -129,139 +439,14 @@ class SkinToneAnalyzer:
                 }
             }
         }
+        
+        The response-ready recommendations for every palette are formatted
+        here too, once, so each analysis only does a dict lookup.
         """
-        self.palettes = {
-            # ========== FAIR SKIN (Light) ==========
-            
-            # Fair + Warm: Golden undertones look best
-            ('Fair', 'Warm'): {
-                'clothing': ['#FFB347', '#FF8C00', '#CD853F', '#DEB887', '#F4A460', '#DAA520'],
-                'makeup': {
-                    'foundation': ['#F5DEB3', '#FFE4B5', '#FFDAB9'],
-                    'lipstick': ['#FF6347', '#FF7F50', '#E75480'],
-                    'eyeshadow': ['#FFD700', '#FFA500', '#FF8C00']
-                },
-                'jewelry': {
-                    'metals': ['#FFD700', '#B76E79'],  # Gold, Rose Gold
-                    'stones': ['#FF8C00', '#DAA520']   # Amber, Topaz
-                }
-            },
-            
-            # Fair + Cool: Silver and cool tones look best
-            ('Fair', 'Cool'): {
-                'clothing': ['#4B0082', '#00CED1', '#E0FFFF', '#B0E0E6', '#ADD8E6', '#87CEEB'],
-                'makeup': {
-                    'foundation': ['#E8E8E8', '#F5F5DC', '#FFFAFA'],
-                    'lipstick': ['#FF1493', '#FF69B4', '#8B0000'],
-                    'eyeshadow': ['#4B0082', '#8A2BE2', '#00CED1']
-                },
-                'jewelry': {
-                    'metals': ['#C0C0C0', '#E8E8E8'],  # Silver, Platinum
-                    'stones': ['#00CED1', '#FF69B4']   # Turquoise, Pink
-                }
-            },
-            
-            # Fair + Neutral: Both warm and cool colors work
-            ('Fair', 'Neutral'): {
-                'clothing': ['#DC143C', '#FF0000', '#FFFFFF', '#000000', '#808080', '#A9A9A9'],
-                'makeup': {
-                    'foundation': ['#F5DEB3', '#FAEBD7', '#F0F8FF'],
-                    'lipstick': ['#DC143C', '#C71585', '#FF6347'],
-                    'eyeshadow': ['#8B008B', '#FF0000', '#006666']
-                },
-                'jewelry': {
-                    'metals': ['#FFD700', '#C0C0C0'],  # Gold, Silver - both work
-                    'stones': ['#FF0000', '#006666']   # Ruby, Emerald
-                }
-            },
-            
-            # ========== MEDIUM SKIN (Mid-tone) ==========
-            
-            # Medium + Warm: Warm, earthy tones
-            ('Medium', 'Warm'): {
-                'clothing': ['#8B4513', '#D2691E', '#CD853F', '#FF8C00', '#FFB347', '#DAA520'],
-                'makeup': {
-                    'foundation': ['#C9A877', '#D4A574', '#DEB887'],
-                    'lipstick': ['#E75480', '#FF6347', '#FF8C00'],
-                    'eyeshadow': ['#8B4513', '#CD853F', '#FFD700']
-                },
-                'jewelry': {
-                    'metals': ['#FFD700', '#B76E79'],  # Gold, Rose Gold
-                    'stones': ['#8B4513', '#FFD700']   # Bronze, Gold
-                }
-            },
-            
-            # Medium + Cool: Cool, jewel tones
-            ('Medium', 'Cool'): {
-                'clothing': ['#4B0082', '#008080', '#20B2AA', '#3CB371', '#66CDAA', '#00FA9A'],
-                'makeup': {
-                    'foundation': ['#C9A877', '#BC8F8F', '#A0826D'],
-                    'lipstick': ['#8B008B', '#FF1493', '#00CED1'],
-                    'eyeshadow': ['#483D8B', '#4169E1', '#00CED1']
-                },
-                'jewelry': {
-                    'metals': ['#C0C0C0', '#E8E8E8'],  # Silver, Platinum
-                    'stones': ['#00CED1', '#50C878']   # Turquoise, Emerald
-                }
-            },
-            
-            # Medium + Neutral: Versatile, works with both warm and cool
-            ('Medium', 'Neutral'): {
-                'clothing': ['#50C878', '#DC143C', '#FF4500', '#228B22', '#FFD700', '#FF6347'],
-                'makeup': {
-                    'foundation': ['#C9A877', '#D4A574', '#BC8F8F'],
-                    'lipstick': ['#DC143C', '#FF4500', '#C71585'],
-                    'eyeshadow': ['#50C878', '#FFD700', '#FF4500']
-                },
-                'jewelry': {
-                    'metals': ['#FFD700', '#B76E79'],  # Gold, Rose Gold - both versatile
-                    'stones': ['#50C878', '#FF4500']   # Emerald, Orange
-                }
-            },
-            
-            # ========== DARK SKIN (Deep) ==========
-            
-            # Dark + Warm: Vibrant warm colors pop
-            ('Dark', 'Warm'): {
-                'clothing': ['#FFD700', '#FFA500', '#FF8C00', '#FF6347', '#DC143C', '#8B4513'],
-                'makeup': {
-                    'foundation': ['#8B4513', '#A0522D', '#8B6914'],
-                    'lipstick': ['#FF4500', '#FF6347', '#DC143C'],
-                    'eyeshadow': ['#FFD700', '#FFA500', '#FF8C00']
-                },
-                'jewelry': {
-                    'metals': ['#FFD700', '#B76E79'],  # Gold, Rose Gold
-                    'stones': ['#FFD700', '#FF4500']   # Gold, Deep Orange
-                }
-            },
-            
-            # Dark + Cool: Cool, bright colors stand out
-            ('Dark', 'Cool'): {
-                'clothing': ['#00CED1', '#87CEEB', '#00FA9A', '#20B2AA', '#FF1493', '#FF69B4'],
-                'makeup': {
-                    'foundation': ['#3D3D3D', '#545454', '#696969'],
-                    'lipstick': ['#FF1493', '#FF69B4', '#00CED1'],
-                    'eyeshadow': ['#00CED1', '#87CEEB', '#FF1493']
-                },
-                'jewelry': {
-                    'metals': ['#C0C0C0', '#E8E8E8'],  # Silver, Platinum
-                    'stones': ['#00CED1', '#FF1493']   # Turquoise, Hot Pink
-                }
-            },
-            
-            # Dark + Neutral: Both warm and cool colors work beautifully
-            ('Dark', 'Neutral'): {
-                'clothing': ['#50C878', '#FFD700', '#FF4500', '#00CED1', '#FF1493', '#DC143C'],
-                'makeup': {
-                    'foundation': ['#704214', '#8B6914', '#A0522D'],
-                    'lipstick': ['#FF4500', '#DC143C', '#FF1493'],
-                    'eyeshadow': ['#50C878', '#FFD700', '#FF4500']
-                },
-                'jewelry': {
-                    'metals': ['#FFD700', '#C0C0C0'],  # Gold and Silver both work
-                    'stones': ['#50C878', '#FFD700']   # Emerald, Gold
-                }
-            }
+        self.palettes = COLOR_PALETTES
+        self._recommendations = {
+            key: self._format_recommendations(key[0], key[1], palette)
+            for key, palette in self.palettes.items()
         }
     
     def analyze_skin_tone(self, image: np.ndarray) -> Dict[str, Any]:
@@ -307,9 +492,7 @@ class SkinToneAnalyzer:
         Process Flow:
             Input Image (RGB)
                 ↓
-            Convert to BGR for OpenCV
-                ↓
-            Face Detection (MediaPipe)
+            Face Detection (MediaPipe, takes RGB as is)
                 ↓
             Skin Region Extraction (HSV mask)
                 ↓
@@ -327,63 +510,138 @@ class SkinToneAnalyzer:
                 ↓
             Format Response
         """
+        # The image stays RGB throughout: MediaPipe wants RGB anyway, and
+        # the HSV conversion reads it with COLOR_RGB2HSV
+        return self._analyze(image, rgb=True)
+    
+    def analyze_skin_tones(self, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Analyze several RGB images in parallel.
+        
+        MediaPipe graphs cannot batch, so the images are spread over one
+        worker thread per pooled detector; more threads would only wait for
+        a detector. OpenCV releases the GIL, so the work really runs side
+        by side.
+        
+        Args:
+            images (List[np.ndarray]): Input images in RGB format
+        
+        Returns:
+            List[Dict[str, Any]]: One result per image, in input order,
+                                  see analyze_skin_tone
+        """
+        if len(images) < 2:
+            return [self.analyze_skin_tone(image) for image in images]
+        
+        # One short-lived pool per batch, shut down before returning, so no
+        # threads outlive the call; starting them is negligible next to the
+        # analyses themselves
+        with ThreadPoolExecutor(
+            max_workers=min(len(images), self._detector_pool_size),
+            thread_name_prefix="skin-tone"
+        ) as pool:
+            return list(pool.map(self.analyze_skin_tone, images))
+    
+    def analyze_skin_tone_bgr(self, image_bgr: np.ndarray, decode_scale: int = 1) -> Dict[str, Any]:
+        """
+        Run the skin tone analysis pipeline on an image that is already BGR.
+        
+        Same pipeline and response format as analyze_skin_tone, for callers
+        that decode with OpenCV (cv2.imdecode returns BGR) and would
+        otherwise pay for a BGR -> RGB -> BGR round trip.
+        
+        Args:
+            image_bgr (np.ndarray): Input image as numpy array (BGR format)
+                                   Shape: (height, width, 3)
+            decode_scale (int): Linear factor the image was shrunk by while
+                                decoding (e.g. 4 for IMREAD_REDUCED_COLOR_4),
+                                so skin pixels are counted at the resolution
+                                of the original photo
+        
+        Returns:
+            dict: Analysis result, see analyze_skin_tone
+        """
+        return self._analyze(image_bgr, rgb=False, decode_scale=decode_scale)
+    
+    def _analyze(self, image: np.ndarray, rgb: bool, decode_scale: int = 1) -> Dict[str, Any]:
+        """
+        Shared pipeline behind analyze_skin_tone and analyze_skin_tone_bgr.
+        
+        The image is never converted between RGB and BGR; each step picks
+        the OpenCV color conversion matching the input's channel order.
+        
+        Args:
+            image (np.ndarray): Input image, shape (height, width, 3)
+            rgb (bool): True if the channels are RGB, False if BGR
+            decode_scale (int): Linear factor the image was shrunk by while
+                                decoding, see analyze_skin_tone_bgr
+        
+        Returns:
+            dict: Analysis result, see analyze_skin_tone
+        """
         try:
-            logger.info("Starting skin tone analysis...")
+            logger.debug("Starting skin tone analysis...")
+            logger.debug("Image size: %s", image.shape)
             
-            # Convert RGB to BGR for OpenCV processing
-            # OpenCV uses BGR format, PIL/numpy typically use RGB
-            image_bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-            logger.info(f"Image size: {image_bgr.shape}")
-            
-            # Step 1: Detect face in image
-            faces = self._detect_faces(image_bgr)
-            if not faces:
+            # Step 1: Detect face in image (the most confident one)
+            face_box = self._detect_first_face(image, rgb=rgb)
+            if face_box is None:
                 logger.warning("No face detected in image")
                 return self._error_response("No face detected in image")
             
-            logger.info(f"Found {len(faces)} face(s)")
+            logger.debug("Face box: x=%d, y=%d, width=%d, height=%d",
+                         face_box['x'], face_box['y'], face_box['width'], face_box['height'])
             
-            # Use the first detected face
-            face_box = faces[0]
-            logger.info(f"Face box: x={face_box['x']}, y={face_box['y']}, "
-                       f"width={face_box['width']}, height={face_box['height']}")
+            # Crop the padded face region at full resolution, then subsample
+            # only the crop: a mean skin color needs a few tens of thousands
+            # of pixels, everything below is memory-bound, and sampling just
+            # the face keeps more face pixels than sampling the whole frame
+            image, face_box = self._crop_face_region(image, face_box)
+            crop_area = image.shape[0] * image.shape[1]
+            image, face_box = self._downsample_for_analysis(image, face_box)
+            # Each analyzed pixel stands for this many pixels of the original
+            # photo: the subsample step squared times the decode reduction
+            area_ratio = crop_area / (image.shape[0] * image.shape[1]) * decode_scale ** 2
             
-            # Step 2: Extract skin region from face
-            skin_mask, skin_region = self._extract_skin_region(image_bgr, face_box)
-            if skin_mask is None or cv2.countNonZero(skin_mask) < 100:
+            # Step 2 & 3: Extract skin region from face, in HSV color space
+            # HSV is better for skin tone analysis than RGB; extraction
+            # converts the face region once and returns it for the
+            # statistics, with a mask of the same size. The mask is counted
+            # once here; extraction itself makes no extra diagnostic passes.
+            # The count is scaled back to full resolution, so the minimum
+            # region, the confidence boost and skin_pixels_detected keep
+            # meaning pixels of the uploaded photo
+            skin_mask, region_hsv = self._extract_skin_region(image, face_box, rgb=rgb)
+            skin_pixel_count = cv2.countNonZero(skin_mask) if skin_mask is not None else 0
+            skin_pixel_count = round(skin_pixel_count * area_ratio)
+            if skin_pixel_count < 100:
                 logger.warning("Could not extract sufficient skin region")
                 return self._error_response("Could not extract sufficient skin region")
             
-            logger.info(f"Extracted skin region with {cv2.countNonZero(skin_mask)} pixels")
-            
-            # Step 3: Convert to HSV color space
-            # HSV is better for skin tone analysis than RGB
-            image_hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+            logger.debug("Extracted skin region with %d pixels", skin_pixel_count)
             
-            # Step 4: Extract color values from skin pixels
-            # skin_mask is binary (0 or 255), we use it to select only skin pixels
-            skin_pixels = image_hsv[skin_mask == 255]
+            # Step 4: Compute per-channel statistics of the skin pixels
+            # cv2.meanStdDev reduces over masked pixels in a single SIMD pass,
+            # without gathering the skin pixels into a separate (N, 3) array
+            means, stds = cv2.meanStdDev(region_hsv, mask=skin_mask)
+            mean_hue, mean_saturation, mean_value = means.ravel()
+            value_std = stds[2, 0]
             
-            # Extract H, S, V channels
-            hue_values = skin_pixels[:, 0]        # Hue channel
-            saturation_values = skin_pixels[:, 1] # Saturation channel
-            value_values = skin_pixels[:, 2]      # Value (brightness) channel
-            
-            logger.info(f"Analyzing {len(hue_values)} skin pixels")
-            logger.info(f"Hue range: {hue_values.min()}-{hue_values.max()}")
-            logger.info(f"Value range: {value_values.min()}-{value_values.max()}")
+            logger.debug("Analyzing %d skin pixels", skin_pixel_count)
+            logger.debug("Mean HSV: (%.1f, %.1f, %.1f), Value std: %.1f",
+                         mean_hue, mean_saturation, mean_value, value_std)
             
             # Step 5: Classify skin depth based on brightness
-            depth = self._classify_depth(value_values)
-            logger.info(f"Skin depth: {depth}")
+            depth = self._classify_depth_from_mean(mean_value)
+            logger.debug("Skin depth: %s", depth)
             
             # Step 6: Classify undertone based on hue
-            undertone, undertone_hue = self._classify_undertone(hue_values)
-            logger.info(f"Skin undertone: {undertone} (hue: {undertone_hue}°)")
+            undertone, undertone_hue = self._classify_undertone_from_mean(mean_hue)
+            logger.debug("Skin undertone: %s (hue: %s°)", undertone, undertone_hue)
             
             # Step 7: Calculate confidence score
-            confidence = self._calculate_confidence(value_values, hue_values)
-            logger.info(f"Confidence: {confidence:.2f}")
+            confidence = self._calculate_confidence_from_stats(value_std, skin_pixel_count)
+            logger.debug("Confidence: %.2f", confidence)
             
             # Step 8: Generate recommendations
             recommendations = self._generate_recommendations(depth, undertone)
@@ -397,84 +655,134 @@ class SkinToneAnalyzer:
                 },
                 "recommendations": recommendations,
                 "analysis_details": {
-                    "hue": round(float(np.mean(hue_values)), 1),
-                    "saturation": round(float(np.mean(saturation_values)) / 255, 2),
-                    "brightness": round(float(np.mean(value_values)) / 255, 2),
-                    "skin_pixels_detected": int(cv2.countNonZero(skin_mask)),
+                    "hue": round(float(mean_hue), 1),
+                    "saturation": round(float(mean_saturation) / 255, 2),
+                    "brightness": round(float(mean_value) / 255, 2),
+                    "skin_pixels_detected": int(skin_pixel_count),
                     "undertone_hue": round(undertone_hue, 1)
                 }
             }
             
-            logger.info("Analysis completed successfully")
+            logger.debug("Analysis completed successfully")
             return response
             
         except Exception as e:
             logger.error(f"Error in analyze_skin_tone: {str(e)}", exc_info=True)
             return self._error_response(f"Analysis failed: {str(e)}")
     
-    def _detect_faces(self, image: np.ndarray) -> List[Dict]:
+    def _detect_first_face(self, image: np.ndarray, rgb: bool = False) -> Optional[Dict]:
         """
-        Detect faces in image using MediaPipe FaceMesh.
+        Detect the most confident face in image using MediaPipe FaceMesh.
+        
+        Only one face is analyzed, so only the highest-scoring detection is
+        converted to a box; MediaPipe does not return detections sorted by
+        score.
         
         Args:
             image (np.ndarray): Input image in BGR format
+            rgb (bool): True if the image is RGB instead; MediaPipe then
+                        gets it without a color conversion
         
         Returns:
-            List[Dict]: List of detected faces with bounding boxes
-                       Each dict contains: x, y, width, height, confidence
+            Optional[Dict]: Detected face with bounding box, or None
+                            Dict contains: x, y, width, height, confidence
+        """
+        with self._checkout_detector() as slot:
+            return self._detect_first_face_with(slot, image, rgb)
+    
+    def _detect_first_face_with(self, slot: _DetectorSlot, image: np.ndarray,
+                                rgb: bool) -> Optional[Dict]:
+        """
+        Body of _detect_first_face, run with a checked-out detector slot.
         """
         try:
-            if self.face_detector is None:
+            face_detector = self._short_range_detector(slot)
+            if face_detector is None:
                 logger.warning("Face detector not available, using Haar Cascade fallback")
-                return self._detect_faces_cascade(image)
+                return self._first_cascade_face(image, slot, rgb=rgb)
             
-            # MediaPipe requires RGB format, so convert BGR to RGB
-            results = self.face_detector.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            faces = []
+            h, w, _ = image.shape
             
-            if results.detections:
-                h, w, _ = image.shape
-                
-                for detection in results.detections:
-                    # Extract bounding box in relative coordinates
-                    bbox = detection.location_data.relative_bounding_box
-                    
-                    # Convert relative coordinates to absolute pixel coordinates
-                    x = int(bbox.xmin * w)
-                    y = int(bbox.ymin * h)
-                    width = int(bbox.width * w)
-                    height = int(bbox.height * h)
-                    confidence = detection.score[0]
-                    
-                    faces.append({
-                        'x': max(0, x),
-                        'y': max(0, y),
-                        'width': width,
-                        'height': height,
-                        'confidence': confidence
-                    })
+            # Shrink large images first; the relative box is scaled back by
+            # the full-size h and w below, so callers see full-res pixels
+            detection_image = image
+            longest = max(h, w)
+            if longest > self.DETECTION_MAX_DIMENSION:
+                scale = self.DETECTION_MAX_DIMENSION / longest
+                detection_image = cv2.resize(
+                    image,
+                    (max(1, round(w * scale)), max(1, round(h * scale))),
+                    interpolation=cv2.INTER_AREA
+                )
             
-            return faces
+            # MediaPipe requires RGB format, so convert BGR to RGB into the
+            # slot's reused buffer; process() copies its input before returning
+            if rgb:
+                image_rgb = np.ascontiguousarray(detection_image)
+            else:
+                image_rgb = slot.rgb_buffer
+                if image_rgb is None or image_rgb.shape != detection_image.shape:
+                    image_rgb = np.empty(detection_image.shape, dtype=np.uint8)
+                    slot.rgb_buffer = image_rgb
+                cv2.cvtColor(detection_image, cv2.COLOR_BGR2RGB, dst=image_rgb)
+            results = face_detector.process(image_rgb)
+            if not results.detections:
+                # No close-up face: retry once for a wide shot
+                full_range_detector = self._full_range_detector(slot)
+                if full_range_detector is not None:
+                    results = full_range_detector.process(image_rgb)
+            if not results.detections:
+                return None
+            
+            logger.debug("Found %d face(s)", len(results.detections))
+            detection = max(results.detections, key=lambda d: d.score[0])
+            
+            # Extract bounding box in relative coordinates
+            bbox = detection.location_data.relative_bounding_box
+            
+            # Convert relative coordinates to absolute pixel coordinates
+            return {
+                'x': max(0, int(bbox.xmin * w)),
+                'y': max(0, int(bbox.ymin * h)),
+                'width': int(bbox.width * w),
+                'height': int(bbox.height * h),
+                'confidence': detection.score[0]
+            }
         
         except Exception as e:
             logger.error(f"Face detection error: {str(e)}, using cascade fallback")
-            return self._detect_faces_cascade(image)
+            return self._first_cascade_face(image, slot, rgb=rgb)
     
-    def _detect_faces_cascade(self, image: np.ndarray) -> List[Dict]:
+    def _first_cascade_face(self, image: np.ndarray, slot: _DetectorSlot,
+                            rgb: bool = False) -> Optional[Dict]:
+        """
+        First face found by the Haar Cascade fallback, or None.
+        """
+        faces = self._detect_faces_cascade(image, slot, rgb=rgb)
+        return faces[0] if faces else None
+    
+    def _detect_faces_cascade(self, image: np.ndarray, slot: _DetectorSlot,
+                              rgb: bool = False) -> List[Dict]:
         """
         Fallback face detection using Haar Cascade (no MediaPipe required).
         
         Args:
             image (np.ndarray): Input image in BGR format
+            slot (_DetectorSlot): Checked-out slot holding the cascade
+            rgb (bool): True if the image is RGB instead
         
         Returns:
             List[Dict]: List of detected faces
         """
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY)
+            # Parsed once per slot, on first use
+            cascade = slot.cascade
+            if cascade is None:
+                cascade = cv2.CascadeClassifier(
+                    cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+                )
+                slot.cascade = cascade
             faces_cv = cascade.detectMultiScale(gray, 1.1, 4, minSize=(30, 30))
             
             faces = []
@@ -492,67 +800,132 @@ class SkinToneAnalyzer:
             logger.error(f"Haar Cascade fallback failed: {str(e)}")
             return []
     
-    def _extract_skin_region(self, image: np.ndarray, face_box: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    def _face_region_bounds(self, image_shape: Tuple[int, ...], face_box: Dict) -> Tuple[int, int, int, int]:
+        """
+        Compute the padded face region (x, y, x2, y2), clipped to the image.
+        
+        Args:
+            image_shape (Tuple[int, ...]): Image shape (height, width, ...)
+            face_box (Dict): Bounding box of detected face
+        
+        Returns:
+            Tuple[int, int, int, int]: Region bounds, end-exclusive
+        """
+        h, w = image_shape[:2]
+        x, y, fw, fh = face_box['x'], face_box['y'], face_box['width'], face_box['height']
+        
+        # Add 20% padding to face box to ensure we get all relevant skin
+        padding = 0.2
+        x = max(0, int(x - fw * padding))
+        y = max(0, int(y - fh * padding))
+        x2 = min(w, int(x + fw + fw * padding))
+        y2 = min(h, int(y + fh + fh * padding))
+        return x, y, x2, y2
+    
+    def _crop_face_region(self, image: np.ndarray, face_box: Dict) -> Tuple[np.ndarray, Dict]:
+        """
+        Crop the image to the padded face region.
+        
+        Args:
+            image (np.ndarray): Input image in BGR format
+            face_box (Dict): Bounding box of detected face in image coordinates
+        
+        Returns:
+            Tuple[np.ndarray, Dict]: (Face region view, Face box in region coordinates)
+        """
+        x, y, x2, y2 = self._face_region_bounds(image.shape, face_box)
+        region_box = dict(face_box)
+        region_box['x'] = face_box['x'] - x
+        region_box['y'] = face_box['y'] - y
+        return image[y:y2, x:x2], region_box
+    
+    def _downsample_for_analysis(self, image: np.ndarray, face_box: Dict) -> Tuple[np.ndarray, Dict]:
+        """
+        Subsample the image (and face box) so its longest side fits ANALYSIS_MAX_DIMENSION.
+        
+        Keeps every step-th pixel in each direction instead of averaging
+        blocks: hue is nonlinear in RGB, so the hue of a box-filtered pixel
+        is not the mean hue of the pixels it replaced, and on noisy photos
+        that shifted the mean hue far enough to flip the undertone. A
+        strided sample keeps real pixels, so the HSV statistics estimates
+        the full-resolution ones while HSV conversion, masking and
+        statistics touch far fewer pixels (a 4000x3000 photo becomes
+        250x188). Images that are already small are returned unchanged.
+        
+        Args:
+            image (np.ndarray): Input image in BGR format
+            face_box (Dict): Bounding box of detected face in image coordinates
+        
+        Returns:
+            Tuple[np.ndarray, Dict]: (Subsampled image, Face box scaled to match)
+        """
+        h, w = image.shape[:2]
+        step = -(-max(h, w) // self.ANALYSIS_MAX_DIMENSION)  # Ceiling division
+        if step <= 1:
+            return image, face_box
+        
+        # Contiguous copy of the strided view, so OpenCV reads it directly
+        small = np.ascontiguousarray(image[::step, ::step])
+        scaled_box = dict(face_box)
+        for key in ('x', 'y', 'width', 'height'):
+            scaled_box[key] = face_box[key] // step
+        
+        logger.debug("Subsampled image for analysis: %dx%d -> %dx%d",
+                     w, h, small.shape[1], small.shape[0])
+        return small, scaled_box
+    
+    def _extract_skin_region(self, image: np.ndarray, face_box: Dict,
+                             rgb: bool = False) -> Tuple[np.ndarray, np.ndarray]:
         """
         Extract skin region from detected face.
         
         Process:
-        1. Convert BGR to HSV
-        2. Apply skin color filter using HSV ranges
-        3. Apply morphological operations to clean mask
-        4. Restrict to face region with padding
-        5. Return binary mask of skin pixels
+        1. Restrict to face region with padding
+        2. Convert the region from BGR (or RGB) to HSV (once)
+        3. Apply skin color filter using HSV ranges
+        4. Apply morphological operations to clean mask
+        5. Return binary mask of skin pixels and the HSV region
+        
+        Everything, the conversion included, only touches the face region,
+        and both results cover just that region: the caller computes its
+        statistics from them without a second conversion, and no image-sized
+        zero mask is built around the region.
         
         Args:
             image (np.ndarray): Input image in BGR format
             face_box (Dict): Bounding box of detected face
+            rgb (bool): True if the image is RGB instead
         
         Returns:
-            Tuple[np.ndarray, np.ndarray]: (Skin mask, Skin region image)
-                                           Mask is binary (0 or 255)
+            Tuple[np.ndarray, np.ndarray]: (Skin mask, HSV face region)
+                                           Same height and width, covering
+                                           the padded face region; mask is
+                                           binary (0 or 255)
         """
         try:
-            # Convert BGR to HSV for better skin detection
-            image_hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+            # Restrict analysis to face region with padding
+            x, y, x2, y2 = self._face_region_bounds(image.shape, face_box)
+            
+            # Convert to HSV for better skin detection; H, S and V come from
+            # the max/min of the channels, so the result (and SKIN_HSV_MIN/MAX)
+            # is the same whichever channel order the input uses
+            region_hsv = cv2.cvtColor(image[y:y2, x:x2],
+                                      cv2.COLOR_RGB2HSV if rgb else cv2.COLOR_BGR2HSV)
             
             # Create binary mask using HSV ranges
             # This isolates pixels that look like skin
-            skin_mask = cv2.inRange(image_hsv, self.SKIN_HSV_MIN, self.SKIN_HSV_MAX)
-            logger.info(f"Initial skin pixels: {cv2.countNonZero(skin_mask)}")
+            region_mask = cv2.inRange(region_hsv, self.SKIN_HSV_MIN, self.SKIN_HSV_MAX)
             
             # Apply morphological operations to improve mask quality
             # These operations help remove noise and fill small holes
             
-            # Kernel for morphological operations (5x5 ellipse)
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-            
             # Close operation: fills small holes in foreground
-            skin_mask = cv2.morphologyEx(skin_mask, cv2.MORPH_CLOSE, kernel)
+            region_mask = cv2.morphologyEx(region_mask, cv2.MORPH_CLOSE, self.SKIN_MASK_KERNEL)
             
             # Open operation: removes small noise
-            skin_mask = cv2.morphologyEx(skin_mask, cv2.MORPH_OPEN, kernel)
+            region_mask = cv2.morphologyEx(region_mask, cv2.MORPH_OPEN, self.SKIN_MASK_KERNEL)
             
-            logger.info(f"After morphology: {cv2.countNonZero(skin_mask)} pixels")
-            
-            # Restrict mask to face region with padding
-            h, w = image.shape[:2]
-            x, y, fw, fh = face_box['x'], face_box['y'], face_box['width'], face_box['height']
-            
-            # Add 20% padding to face box to ensure we get all relevant skin
-            padding = 0.2
-            x = max(0, int(x - fw * padding))
-            y = max(0, int(y - fh * padding))
-            x2 = min(w, int(x + fw + fw * padding))
-            y2 = min(h, int(y + fh + fh * padding))
-            
-            # Extract region of interest from mask
-            face_region = skin_mask[y:y2, x:x2]
-            
-            # Create full mask with zeros everywhere except face region
-            full_mask = np.zeros_like(skin_mask)
-            full_mask[y:y2, x:x2] = face_region
-            
-            return full_mask, image[y:y2, x:x2]
+            return region_mask, region_hsv
         
         except Exception as e:
             logger.error(f"Skin extraction error: {str(e)}")
@@ -573,15 +946,20 @@ class SkinToneAnalyzer:
         Returns:
             str: Skin depth classification (Fair, Medium, or Dark)
         """
-        mean_value = np.mean(value_values)
+        return self._classify_depth_from_mean(np.mean(value_values))
+    
+    def _classify_depth_from_mean(self, mean_value: float) -> str:
+        """
+        Classify skin depth from the mean V channel value (0-255).
         
-        # Thresholds based on empirical testing with diverse skin tones
-        if mean_value > 166:        # 0.65 * 255
-            return 'Fair'
-        elif mean_value > 115:      # 0.45 * 255
-            return 'Medium'
-        else:
-            return 'Dark'
+        Args:
+            mean_value (float): Mean brightness of skin pixels
+        
+        Returns:
+            str: Skin depth classification (Fair, Medium, or Dark)
+        """
+        # Number of thresholds strictly below the mean picks the label
+        return self.DEPTH_LABELS[bisect_left(self.DEPTH_THRESHOLDS, mean_value)]
     
     def _classify_undertone(self, hue_values: np.ndarray) -> Tuple[str, float]:
         """
@@ -597,19 +975,30 @@ class SkinToneAnalyzer:
         Args:
             hue_values (np.ndarray): Hue values (0-180 in OpenCV) of skin pixels
         
+        Returns:
+            Tuple[str, float]: (Undertone classification, Mean hue in degrees)
+        """
+        return self._classify_undertone_from_mean(np.mean(hue_values.astype(float)))
+    
+    def _classify_undertone_from_mean(self, mean_hue: float) -> Tuple[str, float]:
+        """
+        Classify undertone from the mean hue of skin pixels.
+        
+        Args:
+            mean_hue (float): Mean hue in OpenCV units (0-180)
+        
         Returns:
             Tuple[str, float]: (Undertone classification, Mean hue in degrees)
         """
         # Convert OpenCV hue (0-180) to degrees (0-360)
         # OpenCV compresses hue to 0-180 range for 8-bit storage
-        hue_degrees = (hue_values.astype(float) / 180) * 360
-        mean_hue = np.mean(hue_degrees)
+        mean_hue = (float(mean_hue) / 180) * 360
         
         # Normalize hue to 0-360 range
         if mean_hue > 180:
             mean_hue = mean_hue - 360
         
-        logger.info(f"Mean hue: {mean_hue}°")
+        logger.debug("Mean hue: %s°", mean_hue)
         
         # Classify based on hue ranges
         if self.WARM_HUE_RANGE[0] <= mean_hue <= self.WARM_HUE_RANGE[1]:
@@ -639,20 +1028,32 @@ class SkinToneAnalyzer:
         Returns:
             float: Confidence score (0-1 range)
         """
-        # Calculate standard deviation of brightness values
+        return self._calculate_confidence_from_stats(np.std(value_values), len(hue_values))
+    
+    def _calculate_confidence_from_stats(self, value_std: float, pixel_count: int) -> float:
+        """
+        Calculate confidence score from brightness spread and skin pixel count.
+        
+        Args:
+            value_std (float): Standard deviation of V channel values (0-255)
+            pixel_count (int): Number of skin pixels analyzed
+        
+        Returns:
+            float: Confidence score (0-1 range)
+        """
         # Low variation = more consistent skin tone = higher confidence
-        value_std = np.std(value_values) / 255
+        value_std = float(value_std) / 255
         
         # Base confidence inversely proportional to variation
         # High std (variation) → low confidence
         confidence = max(0, 1 - value_std)
         
         # Boost confidence if sufficient pixels detected
-        if len(hue_values) > 500:
+        if pixel_count > 500:
             confidence = min(1, confidence + 0.1)
         
-        logger.info(f"Confidence calculation: base={1 - value_std:.2f}, "
-                   f"final={confidence:.2f}, pixels={len(hue_values)}")
+        logger.debug("Confidence calculation: base=%.2f, final=%.2f, pixels=%d",
+                     1 - value_std, confidence, pixel_count)
         
         return confidence
     
@@ -687,12 +1088,27 @@ class SkinToneAnalyzer:
                 }
             }
         """
-        # Look up palette for this skin tone combination
-        key = (depth, undertone)
-        palette = self.palettes.get(key, self.palettes[('Medium', 'Neutral')])
+        # Look up the preformatted recommendations for this combination
+        recommendations = self._recommendations.get((depth, undertone))
+        if recommendations is not None:
+            logger.debug("Using palette for (%s, %s)", depth, undertone)
+            return recommendations
         
-        logger.info(f"Using palette for ({depth}, {undertone})")
+        # Unknown combination: format the default palette on the fly
+        return self._format_recommendations(depth, undertone, self.palettes[('Medium', 'Neutral')])
+    
+    def _format_recommendations(self, depth: str, undertone: str, palette: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Format a color palette for frontend display.
         
+        Args:
+            depth (str): Skin depth, used in the description
+            undertone (str): Skin undertone, used in the description
+            palette (Dict[str, Any]): Palette from COLOR_PALETTES
+        
+        Returns:
+            dict: Color recommendations, see _generate_recommendations
+        """
         return {
             "clothing": {
                 "best_colors": palette['clothing'][:6],
@@ -729,26 +1145,10 @@ class SkinToneAnalyzer:
         
         Returns:
             List[str]: Corresponding color names
+        
+        Hex codes are matched case-insensitively ('#ffb347' is 'Peach').
         """
-        color_names = {
-            '#FFB347': 'Peach', '#FF8C00': 'Dark Orange', '#CD853F': 'Peru',
-            '#DEB887': 'Burlywood', '#F4A460': 'Sandy Brown', '#DAA520': 'Goldenrod',
-            '#8B4513': 'Saddle Brown', '#D2691E': 'Chocolate', '#FF6347': 'Tomato',
-            '#FF7F50': 'Coral', '#E75480': 'Raspberry', '#FFD700': 'Gold',
-            '#FFA500': 'Orange', '#FF4500': 'Orange Red', '#4B0082': 'Indigo',
-            '#00CED1': 'Dark Turquoise', '#E0FFFF': 'Light Cyan', '#B0E0E6': 'Powder Blue',
-            '#ADD8E6': 'Light Blue', '#87CEEB': 'Sky Blue', '#FF1493': 'Deep Pink',
-            '#FF69B4': 'Hot Pink', '#C71585': 'Medium Violet Red', '#8A2BE2': 'Blue Violet',
-            '#C0C0C0': 'Silver', '#E8E8E8': 'Ghost White', '#50C878': 'Emerald',
-            '#008080': 'Teal', '#20B2AA': 'Light Sea Green', '#3CB371': 'Medium Sea Green',
-            '#66CDAA': 'Medium Aquamarine', '#00FA9A': 'Medium Spring Green',
-            '#483D8B': 'Dark Slate Blue', '#4169E1': 'Royal Blue', '#228B22': 'Forest Green',
-            '#DC143C': 'Crimson', '#FF0000': 'Red', '#FFFFFF': 'White', '#000000': 'Black',
-            '#808080': 'Gray', '#A9A9A9': 'Dark Gray', '#B76E79': 'Rose Gold',
-            '#8B6914': 'Dark Yellow', '#A0522D': 'Sienna', '#704214': 'Sepia',
-            '#545454': 'Dark Gray', '#696969': 'Dim Gray', '#3D3D3D': 'Very Dark Gray'
-        }
-        return [color_names.get(color, 'Color') for color in hex_colors]
+        return [COLOR_NAMES.get(color.upper(), 'Color') for color in hex_colors]
     
     def _metal_names(self, metal_hex: List[str]) -> List[str]:
         """
@@ -759,14 +1159,10 @@ class SkinToneAnalyzer:
         
         Returns:
             List[str]: Metal names
+        
+        Hex codes are matched case-insensitively, like _hex_to_names.
         """
-        metal_map = {
-            '#FFD700': 'Gold',
-            '#C0C0C0': 'Silver',
-            '#B76E79': 'Rose Gold',
-            '#E8E8E8': 'Platinum'
-        }
-        return [metal_map.get(metal, 'Metal') for metal in metal_hex]
+        return [METAL_NAMES.get(metal.upper(), 'Metal') for metal in metal_hex]
     
     def _error_response(self, message: str) -> Dict[str, Any]:
         """
@@ -12,26 +12,78 @@ Run with: pytest tests/test_ml_service.py -v
 Author: GlowMatch Development Team
 """
 
+import asyncio
 import pytest
 import numpy as np
 import cv2
 import sys
 import os
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from app.ml_service import SkinToneAnalyzer
+from app.ml_service import COLOR_NAMES, SkinToneAnalyzer
+from app.config.extended_analyzer import ExtendedSkinToneAnalyzer
+from app.config.skin_tone_enums import SkinDepth, Undertone
+
+
+def _fake_detection(xmin=0.25, ymin=0.2, width=0.5, height=0.6, score=0.9):
+    """Build an object shaped like one MediaPipe face detection"""
+    bbox = SimpleNamespace(xmin=xmin, ymin=ymin, width=width, height=height)
+    return SimpleNamespace(score=[score], location_data=SimpleNamespace(relative_bounding_box=bbox))
+
+
+@pytest.fixture(scope='session')
+def analyzer():
+    """Create one analyzer instance shared by all tests"""
+    return SkinToneAnalyzer()
+
+
+@pytest.fixture(scope='session')
+def extended_analyzer():
+    """Create one extended analyzer from the shipped palette configuration"""
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'app', 'config',
+                               'extended_skin_palettes.json')
+    with open(config_path) as config_file:
+        return ExtendedSkinToneAnalyzer(json.load(config_file))
+
+
+@pytest.fixture(scope='session')
+def synthetic_skin_images():
+    """
+    Create a stack of slightly different synthetic skin images.
+
+    Builds all three 300x300 RGB images at once as one (3, 300, 300, 3)
+    array: white background with a face-like region whose tone steps
+    from RGB(150, 120, 80) by 20 per image.
+
+    Returns:
+        np.ndarray: Image stack (3, 300, 300, 3) in RGB format
+    """
+    tones = np.arange(150, 210, 20)
+    images = np.full((len(tones), 300, 300, 3), 255, dtype=np.uint8)
+    images[:, 50:250, 75:225] = np.stack([tones, tones - 30, tones - 70], axis=-1)[:, None, None, :]
+    return images
+
+
+@pytest.fixture(scope='session')
+def client():
+    """Start the app (and its startup hooks) once for the API tests"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
 
 
 class TestSkinToneAnalyzer:
     """Test suite for SkinToneAnalyzer class"""
     
-    @pytest.fixture
-    def analyzer(self):
-        """Create analyzer instance for tests"""
-        return SkinToneAnalyzer()
-    
     @pytest.fixture
     def synthetic_skin_image(self):
         """
@@ -165,6 +217,11 @@ class TestSkinToneAnalyzer:
         assert 'Peach' in names[0]  # #FFB347
         assert 'Orange' in names[1]  # #FF8C00
     
+    def test_hex_to_names_is_case_insensitive(self, analyzer):
+        """Test lowercase hex codes resolve to the same names"""
+        assert all(key == key.upper() for key in COLOR_NAMES)
+        assert analyzer._hex_to_names(['#ffb347']) == analyzer._hex_to_names(['#FFB347'])
+
     def test_metal_names_conversion(self, analyzer):
         """Test metal hex to name conversion"""
         metals = ['#FFD700', '#C0C0C0', '#B76E79']
@@ -217,10 +274,103 @@ class TestSkinToneAnalyzer:
         # Check mask validity
         assert skin_mask is not None
         assert skin_mask.dtype == np.uint8
-        assert np.unique(skin_mask).tolist() in [
-            [0], [255], [0, 255]
-        ]  # Binary mask
+        assert np.all((skin_mask == 0) | (skin_mask == 255))  # Binary mask
     
+    def test_downsample_for_analysis_bounds_size(self, analyzer):
+        """Test large images are subsampled and the face box scaled with them"""
+        image_bgr = np.zeros((1200, 1600, 3), dtype=np.uint8)
+        face_box = {'x': 400, 'y': 200, 'width': 800, 'height': 600, 'confidence': 0.9}
+
+        small, small_box = analyzer._downsample_for_analysis(image_bgr, face_box)
+
+        # Every 7th pixel: the smallest step that fits 1600 into 256
+        assert max(small.shape[:2]) <= analyzer.ANALYSIS_MAX_DIMENSION
+        assert small.shape[:2] == (172, 229)
+        assert small_box['x'] == 57 and small_box['width'] == 114
+        assert small_box['confidence'] == 0.9
+        assert face_box['x'] == 400  # Original box untouched
+
+    def test_downsample_keeps_noisy_face_classification(self, analyzer, monkeypatch):
+        """Test subsampling a noisy face gives the full-resolution classification"""
+        face_box = {'x': 200, 'y': 150, 'width': 800, 'height': 900, 'confidence': 0.95}
+        monkeypatch.setattr(analyzer, '_detect_first_face',
+                            lambda image, rgb=False: face_box)
+
+        # Low-saturation skin with mild sensor noise: per-pixel hues spread
+        # widely, so averaging RGB before the HSV conversion moves the hue
+        rng = np.random.default_rng(0)
+        image = np.ones((1200, 1200, 3), dtype=np.uint8) * 255
+        face = np.array([80, 75, 68]) + rng.normal(0, 5, (900, 800, 3))
+        image[150:1050, 200:1000] = np.clip(face, 0, 255).astype(np.uint8)
+
+        sampled = analyzer.analyze_skin_tone(image)
+        monkeypatch.setattr(analyzer, 'ANALYSIS_MAX_DIMENSION', 10 ** 6)
+        full = analyzer.analyze_skin_tone(image)
+
+        assert sampled.get('status') != 'error'
+        assert sampled['skin_analysis']['depth'] == full['skin_analysis']['depth']
+        assert sampled['skin_analysis']['undertone'] == full['skin_analysis']['undertone']
+        assert abs(sampled['analysis_details']['hue'] - full['analysis_details']['hue']) < 1
+        assert sampled['recommendations'] == full['recommendations']
+
+    def test_detector_pool_bounds_concurrent_detections(self, monkeypatch):
+        """Test detections never run on more graphs than the pool has slots"""
+        lock = threading.Lock()
+        active, peak, created = [0], [0], []
+
+        class FakeDetector:
+            def process(self, image):
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.01)
+                with lock:
+                    active[0] -= 1
+                return SimpleNamespace(detections=[_fake_detection()])
+
+        monkeypatch.setattr(SkinToneAnalyzer, '_create_face_detector',
+                            lambda self, model_selection: created.append(model_selection) or FakeDetector())
+        pool_analyzer = SkinToneAnalyzer(detector_pool_size=2)
+        # Slots build their graphs on first checkout, not up front
+        assert created == []
+
+        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            boxes = list(executor.map(
+                lambda _: pool_analyzer._detect_first_face(image, rgb=True), range(12)
+            ))
+
+        assert all(box == {'x': 50, 'y': 40, 'width': 100, 'height': 120, 'confidence': 0.9}
+                   for box in boxes)
+        assert peak[0] <= 2
+        assert created == [SkinToneAnalyzer.SHORT_RANGE_MODEL] * len(created)
+        assert 1 <= len(created) <= 2
+
+    def test_full_range_detector_fallback(self, monkeypatch):
+        """Test the full-range model is built once per slot and tried when short-range finds nothing"""
+        created = []
+
+        class FakeDetector:
+            def __init__(self, model_selection):
+                self.model_selection = model_selection
+
+            def process(self, image):
+                if self.model_selection == SkinToneAnalyzer.SHORT_RANGE_MODEL:
+                    return SimpleNamespace(detections=[])
+                return SimpleNamespace(detections=[_fake_detection(score=0.7)])
+
+        monkeypatch.setattr(SkinToneAnalyzer, '_create_face_detector',
+                            lambda self, model_selection: created.append(model_selection)
+                            or FakeDetector(model_selection))
+        pool_analyzer = SkinToneAnalyzer(detector_pool_size=1)
+
+        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        first = pool_analyzer._detect_first_face(image)
+        second = pool_analyzer._detect_first_face(image)
+
+        assert first == second == {'x': 50, 'y': 40, 'width': 100, 'height': 120, 'confidence': 0.7}
+        assert created == [SkinToneAnalyzer.SHORT_RANGE_MODEL, SkinToneAnalyzer.FULL_RANGE_MODEL]
+
     def test_error_response_format(self, analyzer):
         """Test error response formatting"""
         error_msg = "Test error message"
@@ -247,14 +397,61 @@ class TestSkinToneAnalyzer:
             assert skin_analysis['undertone'] in ['Warm', 'Cool', 'Neutral']
             assert 0 <= skin_analysis['confidence'] <= 1
 
+    def test_analyze_skin_tone_bgr_matches_rgb_entry_point(self, analyzer, monkeypatch):
+        """Test BGR entry point gives the same result as the RGB one"""
+        face_box = {'x': 75, 'y': 50, 'width': 150, 'height': 200, 'confidence': 0.95}
+        monkeypatch.setattr(analyzer, '_detect_first_face',
+                            lambda image, rgb=False: face_box)
+
+        # Skin color inside SKIN_HSV_MIN/MAX, so both analyses succeed
+        image_rgb = np.ones((300, 300, 3), dtype=np.uint8) * 255
+        image_rgb[50:250, 75:225] = [80, 72, 64]
+        image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
+
+        result_rgb = analyzer.analyze_skin_tone(image_rgb)
+        result_bgr = analyzer.analyze_skin_tone_bgr(image_bgr)
+
+        assert result_rgb.get('status') != 'error'
+        assert result_bgr == result_rgb
+
+    def test_analyze_skin_tones_matches_single_analysis(self, analyzer, monkeypatch):
+        """Test batch analysis returns the per-image results in input order"""
+        face_box = {'x': 75, 'y': 50, 'width': 150, 'height': 200, 'confidence': 0.95}
+        monkeypatch.setattr(analyzer, '_detect_first_face',
+                            lambda image, rgb=False: face_box)
+
+        # Distinct skin colors inside SKIN_HSV_MIN/MAX, one brightness each
+        images = []
+        for color in ([70, 62, 54], [60, 52, 45], [40, 36, 30]):
+            image = np.ones((300, 300, 3), dtype=np.uint8) * 255
+            image[50:250, 75:225] = color
+            images.append(image)
+
+        results = analyzer.analyze_skin_tones(images)
+
+        assert len(results) == len(images)
+        assert all(result.get('status') != 'error' for result in results)
+        # The BGR entry point gives an independent per-image reference
+        expected = [analyzer.analyze_skin_tone_bgr(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+                    for image in images]
+        assert results == expected
+        brightness = [result['analysis_details']['brightness'] for result in results]
+        assert brightness == sorted(brightness, reverse=True)
+        assert len(set(brightness)) == len(images)
+
+    def test_analyze_skin_tones_leaves_no_threads(self, analyzer):
+        """Test the batch worker threads are shut down before analyze_skin_tones returns"""
+        analyzer.analyze_skin_tones([np.zeros((64, 64, 3), dtype=np.uint8)] * 3)
+
+        assert not [thread for thread in threading.enumerate()
+                    if thread.name.startswith('skin-tone')]
+
 
 class TestIntegration:
     """Integration tests for complete pipeline"""
     
-    def test_full_pipeline_medium_warm_skin(self):
+    def test_full_pipeline_medium_warm_skin(self, analyzer):
         """Test complete pipeline for Medium + Warm skin"""
-        analyzer = SkinToneAnalyzer()
-        
         # Create synthetic medium + warm skin image
         image = np.ones((300, 300, 3), dtype=np.uint8) * 255
         # Medium warm skin: RGB(210, 180, 140)
@@ -266,19 +463,518 @@ class TestIntegration:
         assert result is not None
         assert 'skin_analysis' in result or result.get('status') == 'error'
     
-    def test_multiple_consecutive_analyses(self):
+    def test_multiple_consecutive_analyses(self, analyzer, synthetic_skin_images):
         """Test analyzer can handle multiple consecutive analyses"""
-        analyzer = SkinToneAnalyzer()
-        
-        for i in range(3):
-            # Create slightly different synthetic images
-            image = np.ones((300, 300, 3), dtype=np.uint8) * 255
-            skin_tone = 150 + (i * 20)
-            image[50:250, 75:225] = [skin_tone, skin_tone - 30, skin_tone - 70]
-            
+        for image in synthetic_skin_images:
             result = analyzer.analyze_skin_tone(image)
             assert result is not None
 
 
+class TestSkinToneEnums:
+    """Test the extended depth and undertone enums"""
+
+    # A value strictly above a threshold moves up one bucket
+    @pytest.mark.parametrize('value, expected', [
+        (0, SkinDepth.DEEP),
+        (59, SkinDepth.DEEP),
+        (60, SkinDepth.DEEP),
+        (61, SkinDepth.DARK),
+        (100, SkinDepth.DARK),
+        (101, SkinDepth.TAN),
+        (140, SkinDepth.TAN),
+        (141, SkinDepth.MEDIUM),
+        (180, SkinDepth.MEDIUM),
+        (181, SkinDepth.FAIR),
+        (209, SkinDepth.FAIR),
+        (210, SkinDepth.FAIR),
+        (211, SkinDepth.VERY_FAIR),
+        (255, SkinDepth.VERY_FAIR),
+    ])
+    def test_depth_from_value_boundaries(self, value, expected):
+        """Test SkinDepth.from_value puts each threshold in the lower bucket"""
+        assert SkinDepth.from_value(value) is expected
+
+    # Buckets are [0, 30], (30, 60], (60, 90], (90, 120], (120, 330) and
+    # [330, 360), with 360 itself counted as Warm
+    @pytest.mark.parametrize('hue, expected', [
+        (0, Undertone.WARM),
+        (29.99, Undertone.WARM),
+        (30, Undertone.WARM),
+        (30.01, Undertone.NEUTRAL),
+        (60, Undertone.NEUTRAL),
+        (60.01, Undertone.OLIVE),
+        (90, Undertone.OLIVE),
+        (90.01, Undertone.GOLDEN),
+        (120, Undertone.GOLDEN),
+        (120.01, Undertone.NEUTRAL),
+        (329.99, Undertone.NEUTRAL),
+        (330, Undertone.COOL),
+        (359.99, Undertone.COOL),
+        (360, Undertone.WARM),
+        (-30, Undertone.COOL),      # Normalized to 330
+        (-1e-14, Undertone.WARM),   # Wraps to exactly 360.0
+        (719.5, Undertone.COOL),    # Normalized to 359.5
+    ])
+    def test_undertone_from_hue_boundaries(self, hue, expected):
+        """Test Undertone.from_hue keeps the open and closed ends of every range"""
+        assert Undertone.from_hue(hue) is expected
+
+    @pytest.mark.parametrize('name, level, percentile', [
+        ('Very Fair', 1, (82, 100)),
+        ('Fair', 2, (71, 82)),
+        ('Medium', 3, (55, 71)),
+        ('Tan', 4, (39, 55)),
+        ('Dark', 5, (24, 39)),
+        ('Deep', 6, (0, 24)),
+    ])
+    def test_depth_members_carry_level_and_percentile(self, name, level, percentile):
+        """Test depth members keep their display value and expose level and percentile"""
+        depth = SkinDepth(name)  # Lookup by value still works
+
+        assert depth.value == name
+        assert depth.get_level() == depth.level == level
+        assert depth.get_percentile() == depth.percentile == percentile
+
+    @pytest.mark.parametrize('name, code, hue_range', [
+        ('Warm', 0, (0, 30)),
+        ('Cool', 1, (330, 360)),
+        ('Neutral', 2, (30, 60)),
+        ('Olive', 3, (60, 90)),
+        ('Golden', 4, (90, 120)),
+    ])
+    def test_undertone_members_carry_code_and_hue_range(self, name, code, hue_range):
+        """Test undertone members keep their display value and expose code and hue range"""
+        undertone = Undertone(name)
+
+        assert undertone.value == name
+        assert undertone.code == code
+        assert undertone.get_hue_range() == undertone.hue_range == hue_range
+
+    def test_enum_members_stay_distinct(self):
+        """Test the tuple definitions did not merge members into aliases"""
+        assert len(SkinDepth) == 6
+        assert len(Undertone) == 5
+        assert sorted(depth.level for depth in SkinDepth) == [1, 2, 3, 4, 5, 6]
+        assert sorted(undertone.code for undertone in Undertone) == [0, 1, 2, 3, 4]
+
+
+class TestExtendedAnalyzer:
+    """Test the extended 6 x 5 classification"""
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_classify_skin_region_matches_array_path(self, extended_analyzer, seed):
+        """Test the masked meanStdDev path agrees with the per-channel array methods"""
+        rng = np.random.default_rng(seed)
+        image_hsv = np.stack([
+            rng.integers(0, 180, (120, 160)),
+            rng.integers(0, 256, (120, 160)),
+            rng.integers(0, 256, (120, 160)),
+        ], axis=-1).astype(np.uint8)
+        skin_mask = np.where(rng.random((120, 160)) < 0.4, 255, 0).astype(np.uint8)
+
+        depth, undertone, mean_hue, saturation, brightness = \
+            extended_analyzer.classify_skin_region(image_hsv, skin_mask)
+
+        skin_pixels = image_hsv[skin_mask > 0]
+        expected_depth, _, _ = extended_analyzer._classify_depth_extended(skin_pixels[:, 2])
+        expected_undertone, expected_hue, _ = extended_analyzer._classify_undertone_extended(skin_pixels[:, 0])
+        assert depth == expected_depth
+        assert undertone == expected_undertone
+        assert mean_hue == pytest.approx(expected_hue)
+        assert saturation == pytest.approx(skin_pixels[:, 1].mean() / 255)
+        assert brightness == pytest.approx(skin_pixels[:, 2].mean() / 255)
+
+    @pytest.mark.parametrize('hsv, expected', [
+        ((10, 40, 220), ('Very Fair', 'Warm')),
+        ((20, 40, 150), ('Medium', 'Neutral')),
+        ((170, 40, 50), ('Deep', 'Cool')),
+    ])
+    def test_classify_skin_region_uniform_colors(self, extended_analyzer, hsv, expected):
+        """Test uniform skin regions land in the expected depth and undertone"""
+        image_hsv = np.full((40, 40, 3), hsv, dtype=np.uint8)
+        skin_mask = np.full((40, 40), 255, dtype=np.uint8)
+
+        depth, undertone, _, _, _ = extended_analyzer.classify_skin_region(image_hsv, skin_mask)
+
+        assert (depth.value, undertone.value) == expected
+
+
+def _encode(image_bgr, ext='.jpg', params=()):
+    """Encode a BGR image with OpenCV and return the bytes"""
+    ok, encoded = cv2.imencode(ext, image_bgr, list(params))
+    assert ok
+    return encoded.tobytes()
+
+
+class TestDecoding:
+    """Test the upload decoding helpers in app.main"""
+
+    def test_jpeg_dimensions_baseline(self):
+        """Test width and height are read from a baseline JPEG header"""
+        from app.main import _jpeg_dimensions
+
+        data = _encode(np.zeros((300, 400, 3), dtype=np.uint8))
+
+        assert _jpeg_dimensions(memoryview(data)) == (400, 300)
+
+    def test_jpeg_dimensions_progressive(self):
+        """Test width and height are read from a progressive JPEG header"""
+        from app.main import _jpeg_dimensions
+
+        data = _encode(np.zeros((300, 400, 3), dtype=np.uint8),
+                       params=(cv2.IMWRITE_JPEG_PROGRESSIVE, 1))
+
+        assert data[:2] == b'\xff\xd8' and b'\xff\xc2' in data
+        assert _jpeg_dimensions(memoryview(data)) == (400, 300)
+
+    def test_jpeg_dimensions_truncated(self):
+        """Test a JPEG cut off before or inside its frame header gives None"""
+        from app.main import _jpeg_dimensions
+
+        data = _encode(np.zeros((300, 400, 3), dtype=np.uint8))
+        sof = data.index(b'\xff\xc0')
+
+        assert _jpeg_dimensions(memoryview(data[:sof])) is None
+        assert _jpeg_dimensions(memoryview(data[:sof + 6])) is None
+        assert _jpeg_dimensions(memoryview(data[:2])) is None
+
+    @pytest.mark.parametrize('data', [
+        b'',
+        b'not an image at all',
+        b'\x89PNG\r\n\x1a\n' + b'\x00' * 32,
+        b'\xff\xd8' + b'\x00' * 64,               # SOI followed by non-marker bytes
+        b'\xff\xd8' + b'\xff\xe0\x00\x00' * 16,  # Zero-length segments
+        b'\xff\xd8' + b'\xff' * 64,               # Nothing but fill bytes
+    ])
+    def test_jpeg_dimensions_garbage(self, data):
+        """Test malformed input gives None instead of raising or looping"""
+        from app.main import _jpeg_dimensions
+
+        assert _jpeg_dimensions(memoryview(data)) is None
+
+    @pytest.mark.parametrize('shape, ext, expected_shape, expected_scale', [
+        ((1600, 3200), '.jpg', (400, 800), 4),    # 3200 / 8 < 800 <= 3200 / 4
+        ((1000, 1800), '.jpg', (500, 900), 2),    # 1800 / 4 < 800 <= 1800 / 2
+        ((480, 640), '.jpg', (480, 640), 1),      # Already small
+        ((1600, 3200), '.png', (1600, 3200), 1),  # Only JPEGs decode reduced
+    ])
+    def test_decode_image_picks_reduction(self, shape, ext, expected_shape, expected_scale):
+        """Test large JPEGs decode at the largest reduction that keeps DECODE_MIN_DIMENSION"""
+        from app.main import _decode_image
+
+        data = _encode(np.zeros(shape + (3,), dtype=np.uint8), ext)
+        image_bgr, scale = _decode_image(memoryview(data))
+
+        assert image_bgr.shape[:2] == expected_shape
+        assert scale == expected_scale
+
+    def test_skin_pixel_count_ignores_decode_reduction(self, monkeypatch):
+        """Test a reduced-decode JPEG reports about as many skin pixels as the same PNG"""
+        from app.main import _run_pipeline, get_analyzer
+
+        monkeypatch.setattr(get_analyzer(), '_detect_first_face', lambda image, rgb=False: {
+            'x': image.shape[1] // 4, 'y': image.shape[0] // 4,
+            'width': image.shape[1] // 2, 'height': image.shape[0] // 2, 'confidence': 0.9
+        })
+
+        # BGR dark skin color inside SKIN_HSV_MIN/MAX
+        image = np.ones((1600, 3200, 3), dtype=np.uint8) * 255
+        image[300:1300, 700:2500] = [70, 80, 90]
+
+        from_jpeg = _run_pipeline(memoryview(_encode(image, '.jpg')), 'face.jpg')
+        from_png = _run_pipeline(memoryview(_encode(image, '.png')), 'face.png')
+
+        jpeg_count = from_jpeg['analysis_details']['skin_pixels_detected']
+        png_count = from_png['analysis_details']['skin_pixels_detected']
+        assert abs(jpeg_count - png_count) <= 0.02 * png_count
+
+
+def _call_asgi(app, method, path, headers):
+    """
+    Run one HTTP request through an ASGI app.
+
+    Returns:
+        Tuple[list, int]: (Messages sent by the app, How often it read the body)
+    """
+    sent, body_reads = [], [0]
+
+    async def receive():
+        body_reads[0] += 1
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': headers,
+             'query_string': b'', 'root_path': ''}
+    asyncio.run(app(scope, receive, send))
+    return sent, body_reads[0]
+
+
+class TestUploadSizeLimit:
+    """Test UploadSizeLimitMiddleware in front of a stub endpoint"""
+
+    @pytest.fixture
+    def limited_app(self):
+        """Wrap a stub app that reads the body and answers 200 in the middleware"""
+        from app.main import UploadSizeLimitMiddleware
+
+        calls = []
+
+        async def endpoint(scope, receive, send):
+            calls.append(scope['path'])
+            await receive()
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b'ok'})
+
+        return UploadSizeLimitMiddleware(endpoint, limits={'/upload': 100}), calls
+
+    def test_oversized_content_length_rejected_before_body(self, limited_app):
+        """Test a Content-Length over the limit gets 413 without reading the body"""
+        app, calls = limited_app
+
+        sent, body_reads = _call_asgi(app, 'POST', '/upload', [(b'content-length', b'101')])
+
+        assert sent[0]['status'] == 413
+        assert body_reads == 0
+        assert calls == []
+
+    @pytest.mark.parametrize('headers', [
+        [],                                   # Chunked upload, no Content-Length
+        [(b'content-length', b'not-a-size')],
+        [(b'content-length', b'-5')],
+        [(b'content-length', b'100')],        # Exactly at the limit
+    ])
+    def test_missing_invalid_or_small_content_length_passes(self, limited_app, headers):
+        """Test requests without a usable oversized Content-Length reach the endpoint"""
+        app, calls = limited_app
+
+        sent, body_reads = _call_asgi(app, 'POST', '/upload', headers)
+
+        assert sent[0]['status'] == 200
+        assert body_reads == 1
+        assert calls == ['/upload']
+
+    @pytest.mark.parametrize('method, path', [('GET', '/upload'), ('POST', '/other')])
+    def test_unlimited_requests_pass_through(self, limited_app, method, path):
+        """Test GETs and unlimited paths pass through unchanged"""
+        app, calls = limited_app
+
+        sent, _ = _call_asgi(app, method, path, [(b'content-length', b'10000')])
+
+        assert sent[0]['status'] == 200
+        assert sent[1]['body'] == b'ok'
+        assert calls == [path]
+
+    def test_oversized_upload_rejected_by_service(self, client):
+        """Test the middleware is installed in front of /analyze-skin"""
+        from app.main import MAX_FILE_SIZE, MULTIPART_OVERHEAD
+
+        # Over the file limit plus the multipart allowance, so the request
+        # is refused from its Content-Length
+        response = client.post(
+            '/analyze-skin',
+            files={'file': ('face.jpg', b'\0' * (MAX_FILE_SIZE + MULTIPART_OVERHEAD), 'image/jpeg')}
+        )
+
+        assert response.status_code == 413
+        assert response.json() == {'detail': 'File size exceeds 5MB limit'}
+
+
+class TestResultCache:
+    """Test the upload-hash result cache in app.main"""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        """Start and end every test with an empty result cache"""
+        from app.main import _result_cache
+
+        _result_cache.clear()
+        yield
+        _result_cache.clear()
+
+    @pytest.fixture
+    def analyzer_calls(self, monkeypatch):
+        """Replace the analysis with a stub that records calls; returns the call list"""
+        from app.main import get_analyzer
+
+        calls = []
+
+        def analyze(image_bgr, decode_scale=1):
+            calls.append(int(image_bgr[0, 0, 0]))
+            if image_bgr[0, 0, 0] == 0:
+                return {'status': 'error', 'message': 'No face detected in image'}
+            return {'skin_analysis': {'depth': 'Dark', 'undertone': 'Warm', 'confidence': 1},
+                    'analysis_details': {'hue': 15.0}}
+
+        monkeypatch.setattr(get_analyzer(), 'analyze_skin_tone_bgr', analyze)
+        return calls
+
+    @staticmethod
+    def _upload(value):
+        """PNG bytes of a small image filled with one gray value"""
+        return memoryview(_encode(np.full((8, 8, 3), value, dtype=np.uint8), '.png'))
+
+    def test_repeated_upload_skips_analyzer(self, analyzer_calls):
+        """Test the same bytes are analyzed once and answered from the cache after"""
+        from app.main import _run_pipeline
+
+        first = _run_pipeline(self._upload(10), 'a.png')
+        second = _run_pipeline(self._upload(10), 'a.png')
+
+        assert analyzer_calls == [10]
+        assert second == first
+
+    def test_error_results_not_cached(self, analyzer_calls):
+        """Test failed analyses are retried instead of cached"""
+        from app.main import _result_cache, _run_pipeline
+
+        _run_pipeline(self._upload(0), 'blank.png')
+        _run_pipeline(self._upload(0), 'blank.png')
+
+        assert analyzer_calls == [0, 0]
+        assert len(_result_cache) == 0
+
+    def test_eviction_at_result_cache_size(self, analyzer_calls, monkeypatch):
+        """Test the least recently used entry is dropped past RESULT_CACHE_SIZE"""
+        from app import main
+
+        monkeypatch.setattr(main, 'RESULT_CACHE_SIZE', 2)
+        for value in (10, 20, 30):
+            main._run_pipeline(self._upload(value), 'face.png')
+
+        assert len(main._result_cache) == 2
+        main._run_pipeline(self._upload(30), 'face.png')  # Still cached
+        main._run_pipeline(self._upload(10), 'face.png')  # Evicted first
+        assert analyzer_calls == [10, 20, 30, 10]
+
+    def test_cached_results_are_copies(self, analyzer_calls):
+        """Test changing a returned result does not change later cache hits"""
+        from app.main import _run_pipeline
+
+        first = _run_pipeline(self._upload(10), 'a.png')
+        first['skin_analysis']['depth'] = 'Changed'
+        second = _run_pipeline(self._upload(10), 'a.png')
+        second['analysis_details']['hue'] = -1.0
+        third = _run_pipeline(self._upload(10), 'a.png')
+
+        assert analyzer_calls == [10]
+        assert third['skin_analysis']['depth'] == 'Dark'
+        assert third['analysis_details']['hue'] == 15.0
+
+
+class TestApi:
+    """Tests for the FastAPI endpoints"""
+
+    def test_root_sends_etag(self, client):
+        """Test the root response carries an ETag and the JSON body"""
+        response = client.get('/')
+
+        assert response.status_code == 200
+        assert response.headers['etag'].startswith('"')
+        assert response.json()['message'] == 'Welcome to GlowMatch ML Service'
+
+    @pytest.mark.parametrize('if_none_match', [
+        '{etag}',
+        'W/{etag}',
+        '"something-else", W/{etag}',
+        '*',
+    ])
+    def test_root_not_modified(self, client, if_none_match):
+        """Test a matching If-None-Match (strong, weak, in a list or *) gets an empty 304"""
+        etag = client.get('/').headers['etag']
+
+        response = client.get('/', headers={'If-None-Match': if_none_match.format(etag=etag)})
+
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['etag'] == etag
+
+    def test_root_etag_mismatch(self, client):
+        """Test a stale If-None-Match gets the full response"""
+        response = client.get('/', headers={'If-None-Match': '"stale", W/"older"'})
+
+        assert response.status_code == 200
+        assert response.json()['version'] == '1.0.0'
+
+    def test_analyze_skin_upload(self, client, monkeypatch):
+        """Test a JPEG upload is read, decoded and analyzed"""
+        from app.main import get_analyzer
+
+        face_box = {'x': 75, 'y': 50, 'width': 150, 'height': 200, 'confidence': 0.95}
+        monkeypatch.setattr(get_analyzer(), '_detect_first_face',
+                            lambda image, rgb=False: dict(face_box))
+
+        # BGR for cv2.imencode; a dark skin color inside SKIN_HSV_MIN/MAX
+        image = np.ones((300, 300, 3), dtype=np.uint8) * 255
+        image[50:250, 75:225] = [70, 80, 90]
+        ok, encoded = cv2.imencode('.jpg', image)
+        assert ok
+
+        response = client.post(
+            '/analyze-skin',
+            files={'file': ('face.jpg', encoded.tobytes(), 'image/jpeg')}
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body['success'] is True
+        assert body['skinAnalysis']['depth'] in ['Fair', 'Medium', 'Dark']
+        # The backend and frontend models declare confidence as a string
+        assert isinstance(body['analysisDetails']['confidence'], str)
+
+
+    def test_analyze_skin_batch_keeps_order_and_reports_per_file_errors(self, client, monkeypatch):
+        """Test batch results follow upload order, with an error dict per failed file"""
+        from app.main import get_analyzer
+
+        # The first image is detected slowest, so it finishes last
+        face_box = {'x': 75, 'y': 50, 'width': 150, 'height': 200, 'confidence': 0.95}
+
+        def detect(image, rgb=False):
+            if image[150, 150, 2] == 70:
+                time.sleep(0.2)
+            return dict(face_box)
+
+        monkeypatch.setattr(get_analyzer(), '_detect_first_face', detect)
+
+        # BGR skin colors inside SKIN_HSV_MIN/MAX; PNG keeps them exact
+        images = []
+        for color in ([54, 62, 70], [45, 52, 60]):
+            image = np.ones((300, 300, 3), dtype=np.uint8) * 255
+            image[50:250, 75:225] = color
+            images.append(_encode(image, '.png'))
+
+        response = client.post('/analyze-skin-batch', files=[
+            ('files', ('slow.png', images[0], 'image/png')),
+            ('files', ('notes.txt', b'hello', 'text/plain')),
+            ('files', ('fake.jpg', b'GIF89a not really a jpeg', 'image/jpeg')),
+            ('files', ('fast.png', images[1], 'image/png')),
+        ])
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body['success'] is True and body['count'] == 4
+        results = body['results']
+        assert [result['filename'] for result in results] == ['slow.png', 'notes.txt', 'fake.jpg', 'fast.png']
+        assert [result['success'] for result in results] == [True, False, False, True]
+        assert results[1]['message'].startswith('Invalid file type: text/plain')
+        assert results[2]['message'].startswith('Invalid image data')
+        assert results[0]['skinAnalysis']['hsvColor']['v'] > results[3]['skinAnalysis']['hsvColor']['v']
+
+    def test_analyze_skin_batch_rejects_too_many_files(self, client):
+        """Test a batch over MAX_BATCH_FILES is refused as a whole"""
+        from app.main import MAX_BATCH_FILES
+
+        files = [('files', (f'face{i}.png', b'\x89PNG\r\n\x1a\n', 'image/png'))
+                 for i in range(MAX_BATCH_FILES + 1)]
+        response = client.post('/analyze-skin-batch', files=files)
+
+        assert response.status_code == 400
+        assert response.json()['detail'] == (
+            f'Too many files: {MAX_BATCH_FILES + 1}. Maximum per batch: {MAX_BATCH_FILES}'
+        )
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '--tb=short'])